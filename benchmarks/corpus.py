@@ -0,0 +1,235 @@
+"""
+Generates a deterministic synthetic corpus for the benchmarks: plain text, long meeting transcripts
+(with names, emails and phone numbers for the PII handlers), HTML pages with navigation / script /
+style noise, PDFs, Word documents with tables (including merged cells) and multi-sheet Excel
+workbooks, each in several sizes.
+
+    python benchmarks/corpus.py ./downloads/corpus [--sizes small,medium,large]
+
+PDFs are written by hand (no PDF library is needed), DOCX and XLSX with python-docx and openpyxl.
+"""
+import argparse
+import json
+import os
+import random
+
+# Approximate number of words per size
+SIZES = {
+    "small": 2000,
+    "medium": 20000,
+    "large": 200000,
+}
+
+VOCABULARY = (
+    "the customer project team quarterly revenue migration database latency throughput service "
+    "contract delivery roadmap budget forecast release incident review security compliance storage "
+    "pipeline analysis meeting decision action owner deadline risk mitigation platform network "
+    "capacity region account invoice support ticket escalation feature request design document"
+).split()
+FIRST_NAMES = ["Alice", "Bruno", "Chen", "Divya", "Emma", "Farid", "Grace", "Hiro", "Ines", "Jonas"]
+LAST_NAMES = ["Martin", "Okafor", "Silva", "Novak", "Tanaka", "Weber", "Garcia", "Kumar", "Rossi", "Smith"]
+
+
+def sentence(rng, words=None):
+    words = words or rng.randint(8, 20)
+    text = " ".join(rng.choice(VOCABULARY) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def paragraphs(rng, total_words):
+    """
+    Yields paragraphs of 3 to 8 sentences until about total_words words were produced.
+    """
+    produced = 0
+    while produced < total_words:
+        paragraph = " ".join(sentence(rng) for _ in range(rng.randint(3, 8)))
+        produced += paragraph.count(" ") + 1
+        yield paragraph
+
+
+def person(rng):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return f"{first} {last}", f"{first.lower()}.{last.lower()}@example.com", f"+1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}"
+
+
+def write_text(path, rng, words):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(paragraphs(rng, words)))
+
+
+def write_transcript(path, rng, words):
+    """
+    A meeting transcript: speaker turns that regularly mention names, emails and phone numbers.
+    """
+    produced = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while produced < words:
+            name, email, phone = person(rng)
+            turn = f"{name}: {sentence(rng)} {sentence(rng)}"
+            if rng.random() < 0.2:
+                turn += f" You can reach me at {email} or {phone}."
+            f.write(turn + "\n")
+            produced += turn.count(" ") + 1
+
+
+def write_html(path, rng, words):
+    body = "\n".join(f"<p>{paragraph}</p>" for paragraph in paragraphs(rng, words))
+    noise = "<script>var analytics = {id: 42, events: []}; function track(e) { analytics.events.push(e); }</script>"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Benchmark page</title>"
+            "<style>body { font-family: sans-serif; } .nav a { margin: 0 4px; }</style></head><body>"
+            "<nav class=\"nav\">" + "".join(f"<a href=\"/section/{i}\">Section {i}</a>" for i in range(20)) + "</nav>"
+            f"{noise}<main><h1>Quarterly report</h1>\n{body}\n</main>"
+            "<footer>Copyright Example Corp. All rights reserved. <a href=\"/privacy\">Privacy</a></footer>"
+            "</body></html>"
+        )
+
+
+def write_pdf(path, rng, words, lines_per_page=50, chars_per_line=90):
+    """
+    Writes a text-only PDF (Helvetica 10pt, one content stream per page) without a PDF library.
+    """
+    lines = []
+    for paragraph in paragraphs(rng, words):
+        line = ""
+        for word in paragraph.split():
+            if len(line) + len(word) + 1 > chars_per_line:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.extend([line, ""])
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    objects = []  # object number - 1 -> bytes
+
+    def add(content):
+        objects.append(content)
+        return len(objects)
+
+    catalog = add(None)
+    pages_object = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_objects = []
+    for page_lines in pages:
+        text = "".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*\n"
+            for line in page_lines
+        )
+        stream = f"BT /F1 10 Tf 12 TL 50 780 Td\n{text}ET".encode("latin-1", "replace")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_objects.append(add(
+            f"<< /Type /Page /Parent {pages_object} 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>".encode("ascii")
+        ))
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_object} 0 R >>".encode("ascii")
+    objects[pages_object - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{number} 0 R' for number in page_objects)}] /Count {len(page_objects)} >>"
+    ).encode("ascii")
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, content in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + content + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref))
+
+
+def write_docx(path, rng, words):
+    """
+    Headings, paragraphs, bulleted lists and a table with horizontally and vertically merged cells
+    every few paragraphs.
+    """
+    from docx import Document
+
+    document = Document()
+    for index, paragraph in enumerate(paragraphs(rng, words)):
+        if index % 10 == 0:
+            document.add_heading(sentence(rng, 4).rstrip("."), level=1 + index // 10 % 2)
+        document.add_paragraph(paragraph)
+        if index % 10 == 5:
+            for _ in range(3):
+                document.add_paragraph(sentence(rng, 6), style="List Bullet")
+        if index % 10 == 8:
+            table = document.add_table(rows=4, cols=4)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = rng.choice(VOCABULARY)
+            table.cell(0, 0).merge(table.cell(0, 1))  # gridSpan
+            table.cell(1, 3).merge(table.cell(3, 3))  # vMerge
+    document.save(path)
+
+
+def write_xlsx(path, rng, words, sheets=3):
+    """
+    A workbook of several sheets with a header row; some columns repeat the value of the row above.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    rows_per_sheet = max(10, words // sheets // 8)
+    for sheet_index in range(sheets):
+        worksheet = workbook.create_sheet(f"Sheet{sheet_index + 1}")
+        worksheet.append(["Region", "Account", "Owner", "Quarter", "Revenue", "Status", "Comment"])
+        region = rng.choice(VOCABULARY)
+        for row in range(rows_per_sheet):
+            if row % 25 == 0:
+                region = rng.choice(VOCABULARY)
+            worksheet.append([
+                region, f"ACC-{rng.randint(1000, 9999)}", person(rng)[0], f"Q{row % 4 + 1}",
+                round(rng.uniform(1000, 100000), 2), rng.choice(["open", "closed", "pending"]), sentence(rng, 6),
+            ])
+    workbook.save(path)
+
+
+WRITERS = {
+    "text": ("txt", write_text),
+    "transcript": ("txt", write_transcript),
+    "html": ("html", write_html),
+    "pdf": ("pdf", write_pdf),
+    "docx": ("docx", write_docx),
+    "xlsx": ("xlsx", write_xlsx),
+}
+
+
+def generate_corpus(output_dir, sizes=None, kinds=None, seed=42):
+    """
+    Writes the corpus (skipping files that already exist) and returns {kind: {size: path}}.
+    Formats whose library is not installed are left out.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {}
+    for kind, (extension, writer) in WRITERS.items():
+        if kinds and kind not in kinds:
+            continue
+        for size in sizes or SIZES:
+            path = os.path.join(output_dir, f"{kind}_{size}.{extension}")
+            if not os.path.exists(path):
+                try:
+                    writer(path, random.Random(f"{seed}-{kind}-{size}"), SIZES[size])
+                except ImportError as e:
+                    print(f"Skipping {kind} documents: {e}")
+                    break
+            manifest.setdefault(kind, {})[size] = path
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic benchmark corpus.")
+    parser.add_argument("output_dir", help="Where to write the corpus.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated sizes ({', '.join(SIZES)}).")
+    parser.add_argument("--kinds", default=",".join(WRITERS), help=f"Comma-separated kinds ({', '.join(WRITERS)}).")
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.output_dir, args.sizes.split(","), args.kinds.split(","))
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
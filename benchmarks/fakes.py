@@ -0,0 +1,416 @@
+"""
+In-process stand-ins for the AWS services and HTTP endpoints the handlers talk to, so the
+benchmarks run on a laptop without network access or AWS credentials. The fakes implement
+just the client methods the handlers call, keep their state in memory and can add a
+configurable latency to every call (time.sleep releases the GIL, like a real network wait).
+
+install_fakes() puts them in AWSBotoClientManager's client cache, so every handler
+gets them from AWSBotoClientManager.get_client() without any change to the handler code.
+"""
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+
+class FakeClientError(Exception):
+
+    def __init__(self, code, message=""):
+        super().__init__(f"An error occurred ({code}): {message}")
+        self.response = {"Error": {"Code": code, "Message": message}}
+
+
+class FakeNoSuchKey(FakeClientError):
+
+    def __init__(self, key):
+        super().__init__("NoSuchKey", f"The specified key does not exist: {key}")
+
+
+class FakeStreamingBody:
+    """
+    Mimics botocore's StreamingBody: read(), iter_chunks() and close().
+    """
+
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def read(self, amt=None):
+        return self._stream.read(amt)
+
+    def iter_chunks(self, chunk_size=1024):
+        while True:
+            chunk = self._stream.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self):
+        self._stream.close()
+
+
+class FakeService:
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _call(self, operation):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeS3(FakeService):
+
+    exceptions = SimpleNamespace(NoSuchKey=FakeNoSuchKey, ClientError=FakeClientError)
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.objects = {}  # (bucket, key) -> {"Body": bytes, "Metadata": dict}
+
+    def put_object(self, Bucket, Key, Body=b"", Metadata=None, **kwargs):
+        self._call("PutObject")
+        data = Body.read() if hasattr(Body, "read") else Body
+        data = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        self.objects[(Bucket, Key)] = {"Body": data, "Metadata": dict(Metadata or {})}
+        return {"ETag": self._etag(data)}
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        self._call("GetObject")
+        data = self._get(Bucket, Key)["Body"]
+        if Range:
+            start, end = Range.replace("bytes=", "").split("-")
+            if int(start) >= len(data):
+                raise FakeClientError("InvalidRange", "The requested range is not satisfiable")
+            data = data[int(start):int(end) + 1 if end else None]
+        return {"Body": FakeStreamingBody(data), "ContentLength": len(data), "ETag": self._etag(self._get(Bucket, Key)["Body"])}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._call("HeadObject")
+        if (Bucket, Key) not in self.objects:
+            raise FakeClientError("404", "Not Found")
+        entry = self.objects[(Bucket, Key)]
+        return {"ContentLength": len(entry["Body"]), "ETag": self._etag(entry["Body"]), "Metadata": entry["Metadata"]}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Config=None, Callback=None):
+        with open(Filename, "rb") as f:
+            self.upload_fileobj(f, Bucket, Key, ExtraArgs=ExtraArgs, Config=Config)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, Config=None, Callback=None):
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj.read(), Metadata=(ExtraArgs or {}).get("Metadata"))
+
+    def download_file(self, Bucket, Key, Filename, ExtraArgs=None, Config=None, Callback=None):
+        self._call("GetObject")
+        with open(Filename, "wb") as f:
+            f.write(self._get(Bucket, Key)["Body"])
+
+    def list_objects_v2(self, Bucket, Prefix="", ContinuationToken=None, MaxKeys=1000, **kwargs):
+        self._call("ListObjectsV2")
+        keys = sorted(key for bucket, key in self.objects if bucket == Bucket and key.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + MaxKeys]
+        response = {
+            "KeyCount": len(page),
+            "Contents": [{"Key": key, "Size": len(self.objects[(Bucket, key)]["Body"])} for key in page],
+            "IsTruncated": start + MaxKeys < len(keys),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + MaxKeys)
+        return response
+
+    def get_paginator(self, operation_name):
+        client = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                token = None
+                while True:
+                    page = client.list_objects_v2(ContinuationToken=token, **kwargs)
+                    yield page
+                    token = page.get("NextContinuationToken")
+                    if not token:
+                        break
+
+        return Paginator()
+
+    def _get(self, bucket, key):
+        if (bucket, key) not in self.objects:
+            raise FakeNoSuchKey(key)
+        return self.objects[(bucket, key)]
+
+    @staticmethod
+    def _etag(data):
+        return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+class FakeComprehend(FakeService):
+    """
+    Finds emails, phone numbers and capitalized first/last name pairs with regular expressions,
+    and returns a fixed sentiment and the capitalized words as entities / key phrases.
+    """
+
+    PII_PATTERNS = [
+        ("EMAIL", re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")),
+        ("PHONE", re.compile(r"\+?\d[\d -]{7,}\d")),
+        ("NAME", re.compile(r"\b[A-Z][a-z]+ [A-Z][a-z]+\b")),
+    ]
+    WORD = re.compile(r"\b[A-Z][a-z]{3,}\b")
+
+    def detect_pii_entities(self, Text, LanguageCode="en"):
+        self._call("DetectPiiEntities")
+        self._check_size(Text, 100000)
+        entities = [
+            {"Type": entity_type, "BeginOffset": match.start(), "EndOffset": match.end(), "Score": 0.99}
+            for entity_type, pattern in self.PII_PATTERNS
+            for match in pattern.finditer(Text)
+        ]
+        return {"Entities": sorted(entities, key=lambda entity: entity["BeginOffset"])}
+
+    def batch_detect_sentiment(self, TextList, LanguageCode="en"):
+        self._call("BatchDetectSentiment")
+        return self._batch(TextList, lambda text: {"Sentiment": "NEUTRAL"})
+
+    def batch_detect_entities(self, TextList, LanguageCode="en"):
+        self._call("BatchDetectEntities")
+        return self._batch(TextList, lambda text: {"Entities": [
+            {"Text": match.group(), "Type": "OTHER", "Score": 0.9} for match in self.WORD.finditer(text)
+        ]})
+
+    def batch_detect_key_phrases(self, TextList, LanguageCode="en"):
+        self._call("BatchDetectKeyPhrases")
+        return self._batch(TextList, lambda text: {"KeyPhrases": [
+            {"Text": match.group(), "Score": 0.9} for match in self.WORD.finditer(text)
+        ]})
+
+    def _batch(self, texts, analyze):
+        if len(texts) > 25:
+            raise FakeClientError("BatchSizeLimitExceededException", "At most 25 documents per batch")
+        results = []
+        for index, text in enumerate(texts):
+            self._check_size(text, 5000)
+            results.append(dict(analyze(text), Index=index))
+        return {"ResultList": results, "ErrorList": []}
+
+    @staticmethod
+    def _check_size(text, max_bytes):
+        if len(text.encode("utf-8")) > max_bytes:
+            raise FakeClientError("TextSizeLimitExceededException", f"Text is larger than {max_bytes} bytes")
+
+
+class FakeTextract(FakeService):
+    """
+    Returns LINE blocks of synthetic text, about one line per 80 bytes of the document, 50 lines per
+    page. Asynchronous jobs succeed immediately and their blocks come back in result pages of
+    blocks_per_response blocks.
+    """
+
+    def __init__(self, s3, latency=0.0, blocks_per_response=1000):
+        super().__init__(latency)
+        self.s3 = s3
+        self.blocks_per_response = blocks_per_response
+        self.jobs = {}
+
+    def detect_document_text(self, Document):
+        self._call("DetectDocumentText")
+        return {"Blocks": self._blocks(self._document_bytes(Document))}
+
+    def start_document_text_detection(self, DocumentLocation, **kwargs):
+        self._call("StartDocumentTextDetection")
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = self._blocks(self._document_bytes(DocumentLocation))
+        return {"JobId": job_id}
+
+    def get_document_text_detection(self, JobId, NextToken=None, **kwargs):
+        self._call("GetDocumentTextDetection")
+        blocks = self.jobs[JobId]
+        start = int(NextToken or 0)
+        response = {"JobStatus": "SUCCEEDED", "Blocks": blocks[start:start + self.blocks_per_response]}
+        if start + self.blocks_per_response < len(blocks):
+            response["NextToken"] = str(start + self.blocks_per_response)
+        return response
+
+    def _document_bytes(self, document):
+        if "Bytes" in document:
+            return document["Bytes"]
+        location = document["S3Object"]
+        return self.s3.objects[(location["Bucket"], location["Name"])]["Body"]
+
+    @staticmethod
+    def _blocks(data):
+        blocks = []
+        for line in range(max(1, len(data) // 80)):
+            blocks.append({
+                "Id": f"line-{line}", "BlockType": "LINE", "Page": line // 50 + 1,
+                "Text": f"Line {line} of the scanned document with some recognized words",
+            })
+        return blocks
+
+
+class FakeTranscribe(FakeService):
+    """
+    Transcription jobs complete after job_seconds and write a transcript JSON to the output location
+    in the fake S3, like Amazon Transcribe does. The completion is also published to the
+    LocalCompletionQueue, the in-process event source of TRANSCRIBE_COMPLETION_MODE=local.
+    """
+
+    def __init__(self, s3, latency=0.0, job_seconds=0.0, transcript_factory=None):
+        super().__init__(latency)
+        self.s3 = s3
+        self.job_seconds = job_seconds
+        self.transcript_factory = transcript_factory or (lambda media: "Hello, this is a transcript.")
+        self.jobs = {}
+
+    def start_transcription_job(self, TranscriptionJobName, Media, OutputBucketName, OutputKey="", **kwargs):
+        self._call("StartTranscriptionJob")
+        self.jobs[TranscriptionJobName] = {
+            "started": time.monotonic(), "media": Media["MediaFileUri"], "bucket": OutputBucketName, "key": OutputKey or "",
+        }
+        timer = threading.Timer(self.job_seconds, self._complete, args=(TranscriptionJobName,))
+        timer.daemon = True
+        timer.start()
+        return {"TranscriptionJob": {"TranscriptionJobName": TranscriptionJobName, "TranscriptionJobStatus": "IN_PROGRESS"}}
+
+    def get_transcription_job(self, TranscriptionJobName):
+        self._call("GetTranscriptionJob")
+        job = self.jobs[TranscriptionJobName]
+        status = "IN_PROGRESS"
+        if time.monotonic() - job["started"] >= self.job_seconds:
+            status = "COMPLETED"
+            self._write_transcript(TranscriptionJobName, job)
+        return {"TranscriptionJob": {"TranscriptionJobName": TranscriptionJobName, "TranscriptionJobStatus": status}}
+
+    def _complete(self, job_name):
+        from utils.transcribe_completion import LocalCompletionQueue
+
+        job = self.jobs.get(job_name)
+        if job is None:
+            return
+        self._write_transcript(job_name, job)
+        LocalCompletionQueue.default().publish(job_name)
+
+    def _write_transcript(self, job_name, job):
+        key = f"{job['key']}{job_name}.json"
+        with self._lock:
+            if (job["bucket"], key) not in self.s3.objects:
+                transcript = {"results": {"transcripts": [{"transcript": self.transcript_factory(job["media"])}]}}
+                self.s3.objects[(job["bucket"], key)] = {"Body": json.dumps(transcript).encode("utf-8"), "Metadata": {}}
+
+    def delete_transcription_job(self, TranscriptionJobName):
+        self._call("DeleteTranscriptionJob")
+        self.jobs.pop(TranscriptionJobName, None)
+
+
+class FakeBedrockRuntime(FakeService):
+    """
+    Returns a canned completion after latency + input_kb * latency_per_kb seconds. The body carries
+    the output fields of the Anthropic messages, Anthropic text completion and Titan formats, so the
+    configured AMAZON_BEDROCK_OUTPUT_JSONPATH finds it whichever model is configured.
+    """
+
+    def __init__(self, latency=0.2, latency_per_kb=0.0, completion="This is a summary of the document."):
+        super().__init__(latency)
+        self.latency_per_kb = latency_per_kb
+        self.completion = completion
+
+    def invoke_model(self, body, modelId, accept="application/json", contentType="application/json"):
+        self._call("InvokeModel")
+        if self.latency_per_kb:
+            time.sleep(len(body) / 1024 * self.latency_per_kb)
+        response = {
+            "content": [{"type": "text", "text": self.completion}],
+            "completion": self.completion,
+            "results": [{"outputText": self.completion}],
+        }
+        return {"body": FakeStreamingBody(json.dumps(response).encode("utf-8")), "contentType": "application/json"}
+
+
+def install_fakes(aws_latency=0.0, bedrock_latency=0.2, transcript_factory=None):
+    """
+    Replaces the cached boto3 clients with fakes and returns them by service name.
+    """
+    from utils.aws_boto_client_manager import AWSBotoClientManager
+    from utils.bedrock import BedrockModelProfile
+
+    s3 = FakeS3(aws_latency)
+    fakes = {
+        "s3": s3,
+        "comprehend": FakeComprehend(aws_latency),
+        "textract": FakeTextract(s3, aws_latency),
+        "transcribe": FakeTranscribe(s3, aws_latency, transcript_factory=transcript_factory),
+        "bedrock-runtime": FakeBedrockRuntime(bedrock_latency),
+    }
+    AWSBotoClientManager._clients.update(fakes)
+    # Profiles keep the client they were built with.
+    BedrockModelProfile._profiles.clear()
+    return fakes
+
+
+class LocalHTTPServer:
+    """
+    Serves the HTML pages of the corpus for HTTPHandler and a minimal Quip API (GET /1/threads/<id>,
+    POST /1/threads/new-document) on 127.0.0.1.
+    """
+
+    def __init__(self, pages=None, quip_documents=None, latency=0.0):
+        self.pages = dict(pages or {})  # path -> html
+        self.quip_documents = dict(quip_documents or {})  # thread id -> html
+        self.latency = latency
+        self._server = None
+
+    def start(self):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path.startswith("/1/threads/"):
+                    thread_id = self.path[len("/1/threads/"):]
+                    if thread_id in server.quip_documents:
+                        return self._send(json.dumps({"html": server.quip_documents[thread_id]}), "application/json")
+                elif self.path in server.pages:
+                    return self._send(server.pages[self.path], "text/html; charset=utf-8")
+                self._send("Not found", "text/plain", status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                if self.path == "/1/threads/new-document":
+                    thread_id = uuid.uuid4().hex[:12]
+                    server.quip_documents[thread_id] = form.get("content", [""])[0]
+                    return self._send(json.dumps({"thread": {"id": thread_id}}), "application/json")
+                self._send("Not found", "text/plain", status=404)
+
+            def _send(self, body, content_type, status=200):
+                if server.latency:
+                    time.sleep(server.latency)
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        threading.Thread(target=self._server.serve_forever, name="local-http", daemon=True).start()
+        return self.url
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
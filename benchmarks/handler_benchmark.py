@@ -0,0 +1,316 @@
+"""
+Offline benchmark of the readers, processors and writers. Every handler runs on its own (no next
+handler) against the synthetic corpus (see corpus.py) and in-process stand-ins for AWS and the
+HTTP / Quip endpoints (see fakes.py), so nothing leaves the machine. Reports latency percentiles,
+throughput and memory (peak traced allocations and the process max RSS) per handler and input size.
+
+    python benchmarks/handler_benchmark.py [--sizes small,medium] [--runs 5] [--only PDF,Excel]
+                                           [--completion-mode poll|local]
+                                           [--output results.json] [--compare baseline.json]
+
+With --compare, the run is compared with a previous --output file and the command exits with
+status 1 when a scenario's p50 latency regressed by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import SIZES, generate_corpus  # noqa: E402
+from fakes import LocalHTTPServer, install_fakes  # noqa: E402
+
+BUCKET = "benchmark-bucket"
+
+
+class Scenario:
+    """
+    One handler benchmark. make_request(size) returns (request, input bytes); setup(size), if given,
+    prepares the fakes first.
+    """
+
+    def __init__(self, name, category, handler_name, input_kind, make_request, setup=None):
+        self.name = name
+        self.category = category
+        self.handler_name = handler_name
+        self.input_kind = input_kind
+        self.make_request = make_request
+        self.setup = setup
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def build_scenarios(corpus, env):
+    """
+    The benchmark scenarios. env holds the fakes, the local server and the work directory.
+    """
+    s3 = env["fakes"]["s3"]
+
+    def file_request(kind):
+        return lambda size: ({"path": corpus[kind][size], "text": ""}, os.path.getsize(corpus[kind][size]))
+
+    def text_request(kind, **extra):
+        def make(size):
+            text = read_text(corpus[kind][size])
+            return dict({"text": text, "prompt_file_name": "default_prompt"}, **extra), len(text.encode("utf-8"))
+        return make
+
+    def s3_request(kind):
+        def make(size):
+            key = f"input/{os.path.basename(corpus[kind][size])}"
+            return {"path": f"s3://{BUCKET}/{key}", "text": ""}, os.path.getsize(corpus[kind][size])
+        return make
+
+    def upload(kind):
+        def setup(size):
+            with open(corpus[kind][size], "rb") as f:
+                s3.put_object(Bucket=BUCKET, Key=f"input/{os.path.basename(corpus[kind][size])}", Body=f.read())
+        return setup
+
+    def http_request(size):
+        return {"path": f"{env['server'].url}/pages/html_{size}.html", "text": ""}, os.path.getsize(corpus["html"][size])
+
+    def quip_request(size):
+        return {"path": f"quip://html_{size}", "text": ""}, os.path.getsize(corpus["html"][size])
+
+    def writer_request(size):
+        text = read_text(corpus["text"][size])
+        path = os.path.join(env["work_dir"], f"written_{size}.txt")
+        if os.path.exists(path):
+            os.remove(path)
+        return {"text": text, "path": corpus["text"][size], "write_file_path": path}, len(text.encode("utf-8"))
+
+    def media_request(size):
+        return {"path": f"s3://{BUCKET}/input/meeting_{size}.mp3", "text": ""}, os.path.getsize(corpus["transcript"][size])
+
+    def untokenize_request(size):
+        # Tokenize first (outside of the measured call), the untokenizer then needs the token map.
+        request, input_bytes = text_request("transcript")(size)
+        from handlers.handler_factory import HandlerFactory
+        return HandlerFactory.get_handler("AmazonComprehendPIITokenizeHandler").handle(request), input_bytes
+
+    return [
+        # Readers
+        Scenario("LocalFileReader", "reader", "LocalFileReaderHandler", "text", file_request("text")),
+        Scenario("PDFReader", "reader", "PDFReaderHandler", "pdf", file_request("pdf")),
+        Scenario("WordReader", "reader", "MicrosoftWordReaderHandler", "docx", file_request("docx")),
+        Scenario("ExcelReader", "reader", "MicrosoftExcelReaderHandler", "xlsx", file_request("xlsx")),
+        Scenario("HTTPReader", "reader", "HTTPHandler", "html", http_request),
+        Scenario("QuipReader", "reader", "QuipReaderHandler", "html", quip_request),
+        Scenario("S3Reader", "reader", "AmazonS3ReaderHandler", "text", s3_request("text"), setup=upload("text")),
+        # Processors
+        Scenario("HTMLCleaner", "processor", "HTMLCleanerHandler", "html", text_request("html")),
+        Scenario("Textract", "processor", "AmazonTextractHandler", "pdf", s3_request("pdf"), setup=upload("pdf")),
+        Scenario("Transcribe", "processor", "AmazonTranscriptionHandler", "transcript", media_request),
+        Scenario("ComprehendInsights", "processor", "AmazonComprehendInsightsHandler", "transcript", text_request("transcript")),
+        Scenario("PIITokenize", "processor", "AmazonComprehendPIITokenizeHandler", "transcript", text_request("transcript")),
+        Scenario("PIIUntokenize", "processor", "AmazonComprehendPIIUntokenizeHandler", "transcript", untokenize_request),
+        Scenario("Anonymize", "processor", "AnonymizeHandler", "transcript", text_request("transcript")),
+        Scenario("Prompt", "processor", "PromptHandler", "text", text_request("text")),
+        Scenario("Bedrock", "processor", "AmazonBedrockHandler", "text", text_request("text")),
+        Scenario("BedrockMapReduce", "processor", "AmazonBedrockMapReduceHandler", "text", text_request("text", summarize_mode="map_reduce")),
+        # Writers
+        Scenario("LocalFileWriter", "writer", "LocalFileWriterHandler", "text", writer_request),
+        Scenario("S3Writer", "writer", "AmazonS3WriterHandler", "text", writer_request),
+        Scenario("QuipWriter", "writer", "QuipWriterHandler", "text", writer_request),
+    ]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    position = (len(values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_scenario(scenario, size, runs, warmup):
+    from handlers.handler_factory import HandlerFactory
+
+    if scenario.setup:
+        scenario.setup(size)
+
+    def run_once():
+        request, input_bytes = scenario.make_request(size)
+        handler = HandlerFactory.get_handler(scenario.handler_name)
+        started = time.perf_counter()
+        handler.handle(request)
+        return time.perf_counter() - started, input_bytes
+
+    for _ in range(warmup):
+        run_once()
+
+    latencies = []
+    input_bytes = 0
+    for _ in range(runs):
+        elapsed, input_bytes = run_once()
+        latencies.append(elapsed)
+
+    # One extra, traced run for the allocation peak (tracing slows the code down, so it is not timed).
+    tracemalloc.start()
+    run_once()
+    peak_alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "runs": runs,
+        "input_bytes": input_bytes,
+        "p50_seconds": round(percentile(latencies, 50), 6),
+        "p95_seconds": round(percentile(latencies, 95), 6),
+        "p99_seconds": round(percentile(latencies, 99), 6),
+        "mean_seconds": round(total / runs, 6),
+        "ops_per_second": round(runs / total, 3) if total else None,
+        "throughput_mb_per_second": round(input_bytes * runs / total / (1024 * 1024), 3) if total else None,
+        "peak_alloc_mb": round(peak_alloc / (1024 * 1024), 3),
+        "max_rss_mb": round(max_rss_mb(), 1),
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Prints the p50 change per scenario and returns the list of regressions.
+    """
+    previous = {(result["scenario"], result["size"]): result for result in baseline["results"] if "p50_seconds" in result}
+    regressions = []
+    print(f"\n{'scenario':<20} {'size':<7} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for result in current["results"]:
+        base = previous.get((result["scenario"], result["size"]))
+        if not base or "p50_seconds" not in result or not base["p50_seconds"]:
+            continue
+        change = result["p50_seconds"] / base["p50_seconds"] - 1
+        marker = "  REGRESSION" if change > threshold else ""
+        print(f"{result['scenario']:<20} {result['size']:<7} {base['p50_seconds']:>10.4f} {result['p50_seconds']:>10.4f} {change:>+7.1%}{marker}")
+        if change > threshold:
+            regressions.append({"scenario": result["scenario"], "size": result["size"], "change": round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline handler benchmark with stubbed AWS services.")
+    parser.add_argument("--sizes", default="small,medium", help=f"Comma-separated input sizes ({', '.join(SIZES)}).")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per scenario and size.")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs before the timed ones.")
+    parser.add_argument("--only", default=None, help="Comma-separated scenario names (or categories: reader, processor, writer).")
+    parser.add_argument("--corpus-dir", default=None, help="Where to keep the generated corpus. Defaults to a temporary directory.")
+    parser.add_argument("--aws-latency", type=float, default=0.01, help="Simulated round trip of every fake AWS call, in seconds.")
+    parser.add_argument("--bedrock-latency", type=float, default=0.2, help="Simulated latency of a Bedrock call, in seconds.")
+    parser.add_argument("--completion-mode", choices=("poll", "local"), default="poll",
+                        help="How the Transcribe handler learns that a job finished: polling the job, or the in-process completion queue.")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file.")
+    parser.add_argument("--compare", default=None, help="A previous --output file to compare this run with.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative p50 slowdown reported as a regression (0.10 = 10%%).")
+    args = parser.parse_args()
+
+    sizes = args.sizes.split(",")
+    work_dir = tempfile.mkdtemp(prefix="handler_benchmark_")
+    corpus = generate_corpus(args.corpus_dir or os.path.join(work_dir, "corpus"), sizes)
+
+    # Everything the handlers read from the environment points to local stand-ins.
+    os.chdir(ROOT)  # PromptHandler loads ./prompts
+    os.environ.update({
+        "DIR_STORAGE": work_dir,
+        "BUCKET_NAME": BUCKET,
+        "S3_FOLDER": "input/",
+        "OUTPUT_FOLDER": "output/",
+        "QUIP_TOKEN": "benchmark",
+        "AMAZON_BEDROCK_CACHE": "false",
+        "TRANSCRIPT_CACHE": "false",
+        "TEXT_STREAMING": "false",
+        "TRACING_ENABLED": "false",
+        "TRANSCRIBE_COMPLETION_MODE": args.completion_mode,
+        "TRANSCRIBE_POLL_MIN_SECONDS": "0.01",
+        "TRANSCRIBE_POLL_MAX_SECONDS": "0.05",
+        "TEXTRACT_POLL_MIN_SECONDS": "0.01",
+        "TEXTRACT_POLL_MAX_SECONDS": "0.05",
+    })
+
+    transcripts = {f"s3://{BUCKET}/input/meeting_{size}.mp3": read_text(path) for size, path in corpus.get("transcript", {}).items()}
+    fakes = install_fakes(args.aws_latency, args.bedrock_latency, transcript_factory=lambda media: transcripts.get(media, ""))
+    html = {size: read_text(path) for size, path in corpus.get("html", {}).items()}
+    server = LocalHTTPServer(
+        pages={f"/pages/html_{size}.html": page for size, page in html.items()},
+        quip_documents={f"html_{size}": page for size, page in html.items()},
+    )
+    os.environ["QUIP_ENDPOINT"] = server.start()
+
+    from handlers.handler_factory import HandlerFactory
+    HandlerFactory.discover_handlers()
+
+    only = set(args.only.split(",")) if args.only else None
+    scenarios = [
+        scenario for scenario in build_scenarios(corpus, {"fakes": fakes, "server": server, "work_dir": work_dir})
+        if not only or scenario.name in only or scenario.category in only
+    ]
+
+    results = []
+    print(f"{'scenario':<20} {'size':<7} {'p50 (s)':>9} {'p95 (s)':>9} {'p99 (s)':>9} {'MB/s':>8} {'alloc MB':>9} {'RSS MB':>8}")
+    try:
+        for scenario in scenarios:
+            for size in sizes:
+                result = {"scenario": scenario.name, "category": scenario.category, "handler": scenario.handler_name, "size": size}
+                if size not in corpus.get(scenario.input_kind, {}):
+                    result["error"] = f"no {scenario.input_kind} corpus"
+                else:
+                    try:
+                        result.update(run_scenario(scenario, size, args.runs, args.warmup))
+                    except (Exception, SystemExit) as e:
+                        result["error"] = f"{type(e).__name__}: {e}"
+                results.append(result)
+
+                if "error" in result:
+                    print(f"{scenario.name:<20} {size:<7} skipped: {result['error']}")
+                else:
+                    print(f"{scenario.name:<20} {size:<7} {result['p50_seconds']:>9.4f} {result['p95_seconds']:>9.4f} "
+                          f"{result['p99_seconds']:>9.4f} {result['throughput_mb_per_second'] or 0:>8.2f} "
+                          f"{result['peak_alloc_mb']:>9.2f} {result['max_rss_mb']:>8.1f}")
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "aws_latency": args.aws_latency,
+            "bedrock_latency": args.bedrock_latency,
+            "fake_calls": {service: fake.calls for service, fake in fakes.items()},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compares the HTML-to-text extractors on synthetic pages of increasing size: the streaming lxml
+extractor (clean_html / iter_clean_html) and the BeautifulSoup implementation (HTML_CLEANER=bs4).
+Reports the median time, throughput, peak traced allocations and the size of the extracted text.
+
+    python benchmarks/html_cleaner_benchmark.py [--sizes small,medium,large] [--runs 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import SIZES, write_html  # noqa: E402
+from utils.web_utils import clean_html_bs4, iter_clean_html  # noqa: E402
+
+CHUNK_SIZE = 64 * 1024
+
+
+def lxml_streaming(html):
+    return ''.join(iter_clean_html(html[i:i + CHUNK_SIZE] for i in range(0, len(html), CHUNK_SIZE)))
+
+
+def lxml_whole(html):
+    return ''.join(iter_clean_html([html]))
+
+
+EXTRACTORS = {
+    "lxml (streamed)": lxml_streaming,
+    "lxml": lxml_whole,
+    "bs4": clean_html_bs4,
+}
+
+
+def measure(extractor, html, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        text = extractor(html)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    extractor(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak, len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML cleaners.")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"Comma-separated page sizes ({', '.join(SIZES)}).")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per extractor and size. The median is reported.")
+    args = parser.parse_args()
+
+    print(f"{'size':<8} {'extractor':<16} {'html MB':>8} {'median (s)':>11} {'MB/s':>8} {'alloc MB':>9} {'text chars':>11}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in args.sizes.split(","):
+            path = os.path.join(work_dir, f"{size}.html")
+            write_html(path, random.Random(size), SIZES[size])
+            with open(path, "r", encoding="utf-8") as f:
+                html = f.read()
+            html_mb = len(html.encode("utf-8")) / (1024 * 1024)
+
+            for name, extractor in EXTRACTORS.items():
+                try:
+                    seconds, peak, chars = measure(extractor, html, args.runs)
+                except ImportError as e:
+                    print(f"{size:<8} {name:<16} skipped: {e}")
+                    continue
+                print(f"{size:<8} {name:<16} {html_mb:>8.2f} {seconds:>11.4f} {html_mb / seconds:>8.1f} {peak / (1024 * 1024):>9.2f} {chars:>11}")
+
+
+if __name__ == "__main__":
+    main()
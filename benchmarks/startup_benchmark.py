@@ -0,0 +1,76 @@
+"""
+Measures the CLI cold-start cost for each input type: a fresh interpreter imports main.py,
+discovers the handlers and constructs the chain (no handler is run, nothing is sent to AWS).
+Compares the lazy handler registry with eager discovery, which imports every handler module.
+
+    python benchmarks/startup_benchmark.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A representative input path for each input type of main.determine_input_type().
+SAMPLE_INPUTS = {
+    "text_or_json": "notes.txt",
+    "pdf": "manual.pdf",
+    "microsoft_word": "contract.docx",
+    "microsoft_excel": "export.xlsx",
+    "image_file": "scan.png",
+    "multimedia_file": "call.mp3",
+    "youtube_url": "https://www.youtube.com/watch?v=tQi97_DWi6A",
+    "http": "https://example.com/page.html",
+    "s3": "s3://bucket/key.txt",
+    "quip": "quip://abc123",
+}
+
+CHILD_SCRIPT = """
+import argparse, json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, 'src')
+import main
+from handlers.handler_factory import HandlerFactory
+HandlerFactory.discover_handlers(eager={eager})
+args = argparse.Namespace(chat=None, anonymize=True, summarize_mode=None)
+main.construct_chain(main.determine_input_type({path!r}), args)
+print(json.dumps({{"seconds": time.perf_counter() - started, "modules": len(sys.modules)}}))
+"""
+
+
+def measure(path, eager):
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT.format(path=path, eager=eager)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.strip().splitlines()[-1]
+    result = json.loads(output)
+    result["process_seconds"] = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark per input type, lazy vs eager handler discovery.")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per input type and mode. The median is reported.")
+    args = parser.parse_args()
+
+    print(f"{'input type':<16} {'lazy (s)':>9} {'eager (s)':>10} {'lazy mods':>10} {'eager mods':>11}")
+    for input_type, path in SAMPLE_INPUTS.items():
+        row = {}
+        for mode, eager in (("lazy", False), ("eager", True)):
+            try:
+                runs = [measure(path, eager) for _ in range(args.runs)]
+            except subprocess.CalledProcessError as e:
+                print(f"{input_type:<16} failed ({mode}): {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+                break
+            row[mode] = (statistics.median(run["process_seconds"] for run in runs), runs[-1]["modules"])
+        else:
+            print(f"{input_type:<16} {row['lazy'][0]:>9.3f} {row['eager'][0]:>10.3f} {row['lazy'][1]:>10} {row['eager'][1]:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/opt/anaconda3/bin/python
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from handlers.async_chain_executor import AsyncChainExecutor
+from handlers.handler_factory import HandlerFactory
+from main import construct_chain, determine_input_type
+from utils.bedrock_cache import BedrockResponseCache
+from utils.text_chunker import SUMMARIZATION_MODES
+from utils.tracing import Tracer
+
+# Input types whose reader is CPU-bound (pdfminer, python-docx, openpyxl). Their reader runs in a
+# worker process, while the rest of the chain (mostly AWS calls) runs in a thread.
+CPU_BOUND_INPUT_TYPES = ("pdf", "microsoft_word", "microsoft_excel")
+
+
+def collect_inputs(source):
+    """
+    Expands the batch source into a list of input items ({"path": ..., optional request overrides}).
+    The source can be a directory (walked recursively), a glob pattern or a JSONL manifest.
+    """
+    if os.path.isdir(source):
+        items = []
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for name in sorted(files):
+                if not name.startswith('.'):
+                    items.append({"path": os.path.join(root, name)})
+        return items
+
+    if source.endswith('.jsonl') and os.path.isfile(source):
+        items = []
+        with open(source, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                # A manifest line is either a JSON object with a "path" key or a bare JSON string.
+                item = json.loads(line)
+                items.append(item if isinstance(item, dict) else {"path": item})
+        return items
+
+    return [{"path": path} for path in sorted(glob.glob(source, recursive=True)) if os.path.isfile(path)]
+
+
+def read_in_process(handler_name, request):
+    """
+    Runs a single reader handler (without a next handler) in a worker process and returns the request.
+    """
+    return HandlerFactory.get_handler(handler_name).handle(request)
+
+
+def prepare_input(index, item, args, output_dir):
+    """
+    Builds the request and the type-specific chain for one input.
+    """
+    path = item["path"]
+    input_type = item.get("type") or determine_input_type(path)
+
+    base_name = f"{index:05d}_{os.path.splitext(os.path.basename(path.rstrip('/')))[0] or 'input'}"
+    request = {
+        "type": input_type,
+        "path": path,
+        "prompt_file_name": args.prompt_file_name,
+        "summarize_mode": args.summarize_mode,
+        "write_file_path": os.path.join(output_dir, f"{base_name}.source.txt"),
+        "text": ""
+    }
+    request.update({k: v for k, v in item.items() if k not in ("path", "type")})
+
+    return request, construct_chain(input_type, args), os.path.join(output_dir, f"{base_name}.txt")
+
+
+def write_result(result, output_file):
+    text = result.get("text") if result else None
+    if not isinstance(text, str):
+        text = json.dumps(text, default=str)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def process_input(index, item, args, output_dir, process_pool):
+    """
+    Pushes one input through its type-specific chain and returns the result record.
+    """
+    started = time.perf_counter()
+    record = {"index": index, "path": item["path"]}
+
+    try:
+        request, chain, output_file = prepare_input(index, item, args, output_dir)
+        record["type"] = request["type"]
+
+        if process_pool is not None and request["type"] in CPU_BOUND_INPUT_TYPES:
+            request = process_pool.submit(read_in_process, type(chain).__name__, request).result()
+            chain = chain.get_next(request)
+
+        result = chain.handle(request) if chain else request
+        write_result(result, output_file)
+
+        record.update({"status": "succeeded", "output_file": output_file})
+    except (Exception, SystemExit) as e:
+        record.update({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+async def process_input_async(index, item, args, output_dir, process_pool, executor, semaphore):
+    """
+    Async counterpart of process_input(): the chain is driven by the AsyncChainExecutor, so
+    waiting on AWS does not hold a thread.
+    """
+    async with semaphore:
+        started = time.perf_counter()
+        record = {"index": index, "path": item["path"]}
+
+        try:
+            request, chain, output_file = prepare_input(index, item, args, output_dir)
+            record["type"] = request["type"]
+
+            if process_pool is not None and request["type"] in CPU_BOUND_INPUT_TYPES:
+                loop = asyncio.get_running_loop()
+                request = await loop.run_in_executor(process_pool, read_in_process, type(chain).__name__, request)
+                chain = chain.get_next(request)
+
+            result = await executor.run(chain, request) if chain else request
+            await asyncio.to_thread(write_result, result, output_file)
+
+            record.update({"status": "succeeded", "output_file": output_file})
+        except (Exception, SystemExit) as e:
+            record.update({"status": "failed", "error": f"{type(e).__name__}: {e}"})
+
+        record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return record
+
+
+async def iter_records_async(items, args, output_dir, process_pool):
+    executor = AsyncChainExecutor(max_workers=args.workers, max_concurrency=args.concurrency)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    try:
+        tasks = [process_input_async(i, item, args, output_dir, process_pool, executor, semaphore) for i, item in enumerate(items)]
+        return [await task for task in asyncio.as_completed(tasks)]
+    finally:
+        executor.shutdown()
+
+
+def iter_records(items, args, output_dir, process_pool):
+    """
+    Yields one result record per input (in completion order).
+    """
+    if args.use_async:
+        yield from asyncio.run(iter_records_async(items, args, output_dir, process_pool))
+        return
+
+    with ThreadPoolExecutor(max_workers=args.workers) as thread_pool:
+        futures = [thread_pool.submit(process_input, i, item, args, output_dir, process_pool) for i, item in enumerate(items)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_batch(args):
+    items = collect_inputs(args.source)
+    if not items:
+        print(f"No inputs found for: {args.source}")
+        return None
+
+    output_dir = args.output_dir or f"./downloads/batch_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+    os.makedirs(output_dir, exist_ok=True)
+    results_file = os.path.join(output_dir, "results.jsonl")
+
+    print(f"Processing {len(items)} inputs with {args.workers} threads and {args.processes} processes...")
+
+    # Handler discovery
+    HandlerFactory.discover_handlers()
+
+    started_at = datetime.now().isoformat()
+    started = time.perf_counter()
+    succeeded = 0
+    failures = []
+    by_type = {}
+
+    process_pool = ProcessPoolExecutor(max_workers=args.processes) if args.processes > 0 else None
+    try:
+        with open(results_file, 'w', encoding='utf-8') as results:
+            for done, record in enumerate(iter_records(items, args, output_dir, process_pool), start=1):
+                results.write(json.dumps(record) + '\n')
+                results.flush()
+
+                by_type[record.get("type", "unknown")] = by_type.get(record.get("type", "unknown"), 0) + 1
+                if record["status"] == "succeeded":
+                    succeeded += 1
+                else:
+                    failures.append({"path": record["path"], "error": record["error"]})
+                print(f"[{done}/{len(items)}] {record['status']}: {record['path']} ({record['elapsed_seconds']}s)")
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    bedrock_cache = BedrockResponseCache.get_default()
+    tracer = Tracer.get_default()
+    summary = {
+        "source": args.source,
+        "started_at": started_at,
+        "elapsed_seconds": round(elapsed, 3),
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": len(failures),
+        "throughput_per_minute": round(len(items) / elapsed * 60, 2) if elapsed else None,
+        "workers": args.workers,
+        "processes": args.processes,
+        "by_type": by_type,
+        "bedrock_cache": bedrock_cache.stats() if bedrock_cache else None,
+        "trace_report": tracer.write_report(os.path.join(output_dir, "trace_report.json")) if tracer else None,
+        "results_file": results_file,
+        "failures": failures
+    }
+    with open(os.path.join(output_dir, "summary.json"), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process a directory, glob or JSONL manifest of inputs concurrently.')
+
+    parser.add_argument('source', type=str, help='A directory, a glob pattern (quote it) or a .jsonl manifest with one {"path": ...} per line.')
+    parser.add_argument('prompt_file_name', nargs='?', default='default_prompt', help='The name of the prompt file. Defaults to "default_prompt" if not specified.')
+    parser.add_argument("--summarize-mode", type=str, default=None, choices=SUMMARIZATION_MODES, help="Use 'map_reduce' or 'refine' to summarize texts larger than the model context in several calls.")
+    parser.add_argument("--anonymize", type=str, default=True, help="Anonymize customer names before sending to the model. By default this is set to true.")
+    parser.add_argument('--no-cache', action='store_true', help='Always call Amazon Bedrock, even if an identical request has been answered before.')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('BATCH_WORKERS', 8)), help='Number of concurrent chains (threads). Defaults to 8.')
+    parser.add_argument('--processes', type=int, default=int(os.getenv('BATCH_PROCESSES', os.cpu_count() or 1)), help='Number of worker processes for CPU-bound readers (PDF, Word, Excel). Use 0 to read in threads.')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='Drive the chains with the asyncio chain executor instead of one thread per chain.')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('ASYNC_MAX_CONCURRENCY', 256)), help='Maximum number of chains in flight in --async mode. Defaults to 256.')
+    parser.add_argument('--output-dir', type=str, default=None, help='Where to write results. Defaults to ./downloads/batch_<timestamp>.')
+
+    args = parser.parse_args()
+    if args.no_cache:
+        os.environ['AMAZON_BEDROCK_CACHE'] = 'false'
+    # Interactive chat does not make sense for unattended batch runs.
+    args.chat = None
+
+    summary = run_batch(args)
+    if summary is None:
+        sys.exit(1)
+
+    print(json.dumps({k: v for k, v in summary.items() if k != "failures"}, indent=2))
+    if summary["failed"]:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
 from __future__ import annotations
+import asyncio
+import contextvars
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from typing import Any
-from handlers.handler import Handler
+from handlers.handler import AsyncHandler, Handler
+from utils.text_stream import materialize
+from utils.tracing import Tracer, instrument_handler_class
+
+# When set, handle() returns after the current handler instead of forwarding the
+# request down the chain. The async chain executor uses this to drive sync
+# handlers one step at a time.
+single_step: ContextVar[bool] = ContextVar("single_step", default=False)
+
 class AbstractHandler(Handler):
     """
     The default chaining behavior can be implemented inside a base handler
@@ -10,6 +22,15 @@ class AbstractHandler(Handler):
 
     _next_handler: Handler = None
 
+    # Handlers that can consume request["text_stream"] (see utils/text_stream.py) set this to True.
+    # For all other handlers the stream is materialized into request["text"] before they run.
+    supports_text_stream: bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every handler records a tracing span per invocation when TRACING_ENABLED is set (see utils/tracing.py).
+        instrument_handler_class(cls)
+
     def set_next(self, handler: Handler) -> Handler:
         self._next_handler = handler
         # Returning a handler from here will let us link handlers in a
@@ -17,9 +38,50 @@ class AbstractHandler(Handler):
         # local_file_handler.set_next(prompt_handler).set_next(summarization_handler)
         return handler
 
+    def get_next(self, request: dict) -> Handler:
+        """
+        Returns the handler the request goes to after this one. Handlers that
+        short-circuit part of the chain override this.
+        """
+        return self._next_handler
+
     @abstractmethod
     def handle(self, request: dict) -> dict:
-        if self._next_handler:
-            return self._next_handler.handle(request)
+        Tracer.record_output(request)
+        next_handler = self.get_next(request)
+        if next_handler and not single_step.get():
+            if not getattr(next_handler, 'supports_text_stream', False):
+                materialize(request)
+            return next_handler.handle(request)
+
+        if not next_handler:
+            # End of the chain: callers expect the text in request["text"].
+            materialize(request)
+        return request
+
+class AbstractAsyncHandler(AbstractHandler, AsyncHandler):
+    """
+    Base class for handlers with a native async implementation. Subclasses
+    implement handle_async(); the sync handle() runs it on a private event loop
+    so the handler can still be used in a regular chain. Async callers should
+    await handle_async() (or use the AsyncChainExecutor) instead of handle().
+    """
+
+    def handle(self, request: dict) -> dict:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            request = asyncio.run(self.handle_async(request))
+        else:
+            # Called from a running event loop (a notebook, an async caller): asyncio.run() cannot
+            # be nested, so the coroutine runs on its own loop in a helper thread, with the caller's
+            # context variables. .result() still blocks the caller's loop until the handler is done;
+            # async callers should await handle_async() or use the AsyncChainExecutor instead.
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                request = executor.submit(context.run, asyncio.run, self.handle_async(request)).result()
+        return super().handle(request)
 
-        return request
\ No newline at end of file
+    @abstractmethod
+    async def handle_async(self, request: dict) -> dict:
+        pass
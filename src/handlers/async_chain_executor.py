@@ -0,0 +1,80 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from handlers.abstract_handler import single_step
+from handlers.handler import AsyncHandler, Handler
+from utils.text_stream import has_text_stream, materialize
+
+class AsyncChainExecutor:
+    """
+    Runs handler chains on an asyncio event loop. Handlers implementing
+    AsyncHandler are awaited on the loop, regular sync handlers are run one
+    step at a time in a bounded thread pool. Many chains can be in flight in
+    one process without dedicating a thread to each of them.
+    """
+
+    def __init__(self, max_workers: int = None, max_concurrency: int = None):
+        self.max_workers = max_workers or int(os.getenv('ASYNC_MAX_WORKERS', 32))
+        self.max_concurrency = max_concurrency or int(os.getenv('ASYNC_MAX_CONCURRENCY', 256))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chain")
+
+    async def run(self, chain: Handler, request: dict) -> dict:
+        """
+        Runs a single chain for the given request and returns the resulting request.
+        """
+        handler = chain
+        while handler:
+            if not getattr(handler, 'supports_text_stream', False):
+                request = await self.materialize(request)
+            request = await self.run_step(handler, request)
+            handler = handler.get_next(request)
+        return await self.materialize(request)
+
+    async def materialize(self, request: dict) -> dict:
+        """
+        Joins a pending text stream into request["text"]; producing the stream may block, so it runs in the pool.
+        """
+        if not has_text_stream(request):
+            return request
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, materialize, request)
+
+    async def run_step(self, handler: Handler, request: dict) -> dict:
+        """
+        Runs only the given handler, without forwarding the request down the chain.
+        """
+        if isinstance(handler, AsyncHandler):
+            return await handler.handle_async(request)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._run_sync_step, handler, request)
+
+    async def run_many(self, jobs) -> list:
+        """
+        Runs many (chain, request) pairs concurrently, with at most max_concurrency chains
+        in flight. Results are returned in the order of the jobs; a failed chain returns its exception.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_bounded(chain, request):
+            async with semaphore:
+                return await self.run(chain, request)
+
+        return await asyncio.gather(*(run_bounded(chain, request) for chain, request in jobs), return_exceptions=True)
+
+    def execute(self, chain: Handler, request: dict) -> dict:
+        """
+        Convenience entry point for sync code: runs the chain to completion on a new event loop.
+        """
+        return asyncio.run(self.run(chain, request))
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+    @staticmethod
+    def _run_sync_step(handler: Handler, request: dict) -> dict:
+        token = single_step.set(True)
+        try:
+            return handler.handle(request)
+        finally:
+            single_step.reset(token)
@@ -14,4 +14,16 @@ class Handler(ABC):
 
     @abstractmethod
     def handle(self, request) -> Optional[dict]:
-        pass
\ No newline at end of file
+        pass
+
+class AsyncHandler(Handler):
+    """
+    The async variant of the Handler interface. handle_async() processes the
+    request for this handler only and returns it, the chain executor then moves
+    on to the next handler. This lets long AWS round trips await on the event
+    loop instead of blocking a thread.
+    """
+
+    @abstractmethod
+    async def handle_async(self, request) -> Optional[dict]:
+        pass
@@ -1,43 +1,137 @@
+import ast
 import importlib
+import inspect
+import json
+import os
 import pathlib
 from handlers.abstract_handler import AbstractHandler
 
+# Base classes that make a class a handler. Subclasses of handler classes are found transitively.
+HANDLER_BASES = {"AbstractHandler"}
+MANIFEST_FILE_NAME = ".handler_manifest.json"
+
 class HandlerFactory:
+    """
+    Lazy handler registry. discover_handlers() builds a manifest mapping handler names to module
+    paths by parsing the handler sources (nothing is imported), and caches it next to the handlers;
+    the cache is rebuilt when a module is added, removed or modified. get_handler() imports a
+    handler's module only the first time that handler is requested, so a run only pays for the
+    dependencies (spaCy, moviepy, pdfminer, ...) of the handlers it actually uses.
+    """
     _handlers = {}
+    _manifest = {}
 
     @classmethod
-    def discover_handlers(cls, root_path='./src/handlers'):
-        # Convert to Path object for easier manipulation
-        root = pathlib.Path(root_path)
-        
-        for path in root.rglob('*.py'):  # Recursively go through all .py files
-            # Skip __init__.py files to avoid imports of package initializers
-            if path.name == '__init__.py':
-                continue
-            
+    def discover_handlers(cls, root_path=None, eager=False):
+        root = pathlib.Path(root_path) if root_path else pathlib.Path(__file__).parent
+        cls._manifest.update(cls.load_manifest(root))
 
-            # Generate a module path for importlib
-            relative_path = path.relative_to(root.parent)
-            module_path = '.'.join(relative_path.with_suffix('').parts)
-            
-            # Dynamically import the module
-            module = importlib.import_module(module_path)
-
-            # Inspect all attributes of the module to find handler classes
-            for attribute_name in dir(module):
-                attribute = getattr(module, attribute_name)
-                if isinstance(attribute, type) and issubclass(attribute, AbstractHandler) and attribute is not AbstractHandler:
-                    # Store the handler class for later instantiation
-                    handler_name = attribute.__name__
-                    cls._handlers[handler_name] = attribute
+        if eager:
+            # Import every handler module up front (the behaviour before the lazy registry).
+            for handler_name in list(cls._manifest):
+                cls._load_class(handler_name)
+
+    @classmethod
+    def register(cls, handler_name=None):
+        """
+        Class decorator to register a handler defined outside of the handlers folder.
+        """
+        def decorator(handler_class):
+            cls._handlers[handler_name or handler_class.__name__] = handler_class
+            return handler_class
+        return decorator
 
     @classmethod
     def get_handler(cls, handler_type):
         # Ensure handlers are discovered before attempting to get one
-        if not cls._handlers:  # Discover handlers if not already done
+        if not cls._manifest and handler_type not in cls._handlers:  # Discover handlers if not already done
             cls.discover_handlers()
-        handler_class = cls._handlers.get(handler_type)
+        handler_class = cls._load_class(handler_type)
         if handler_class:
             return handler_class()  # Instantiate the handler
         else:
-            raise ValueError(f"Handler not found for type: {handler_type}")
\ No newline at end of file
+            raise ValueError(f"Handler not found for type: {handler_type}")
+
+    @classmethod
+    def _load_class(cls, handler_name):
+        handler_class = cls._handlers.get(handler_name)
+        if handler_class is None and handler_name in cls._manifest:
+            module = importlib.import_module(cls._manifest[handler_name])
+            attribute = getattr(module, handler_name, None)
+            if isinstance(attribute, type) and issubclass(attribute, AbstractHandler) and not inspect.isabstract(attribute):
+                handler_class = cls._handlers[handler_name] = attribute
+        return handler_class
+
+    @classmethod
+    def load_manifest(cls, root):
+        """
+        Returns the {handler name: module path} manifest for the handlers under root, from the cache
+        file when none of the modules changed since it was written.
+        """
+        paths = sorted(path for path in root.rglob('*.py') if path.name != '__init__.py')
+        mtimes = {str(path.relative_to(root)): os.stat(path).st_mtime for path in paths}
+        manifest_path = root / MANIFEST_FILE_NAME
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("modules") == mtimes and isinstance(cached.get("handlers"), dict):
+                return cached["handlers"]
+        except (OSError, ValueError, AttributeError):
+            # Missing, unreadable or not a manifest: rebuild it from the sources.
+            pass
+
+        handlers = cls.build_manifest(root, paths)
+        # Write to a temporary file first: concurrent processes (e.g. batch workers) and interrupted
+        # runs must never leave a truncated manifest behind.
+        tmp_path = manifest_path.with_name(f"{MANIFEST_FILE_NAME}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"modules": mtimes, "handlers": handlers}, f, indent=2)
+            os.replace(tmp_path, manifest_path)
+        except OSError as e:
+            print(f"Could not write the handler manifest {manifest_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return handlers
+
+    @classmethod
+    def build_manifest(cls, root, paths):
+        """
+        Parses the handler modules (without importing them) and maps each concrete handler class to its module.
+        """
+        classes = {}  # class name -> (module path, base names, is abstract)
+        for path in paths:
+            # Generate a module path for importlib
+            relative_path = path.relative_to(root.parent)
+            module_path = '.'.join(relative_path.with_suffix('').parts)
+
+            tree = ast.parse(path.read_text(encoding='utf-8'), filename=str(path))
+            for node in tree.body:
+                if isinstance(node, ast.ClassDef):
+                    bases = [base.id if isinstance(base, ast.Name) else getattr(base, 'attr', None) for base in node.bases]
+                    classes[node.name] = (module_path, bases, cls._has_abstract_methods(node))
+
+        def is_handler(class_name, seen=()):
+            if class_name in HANDLER_BASES:
+                return True
+            if class_name not in classes or class_name in seen:
+                return False
+            return any(is_handler(base, seen + (class_name,)) for base in classes[class_name][1])
+
+        return {
+            class_name: module_path
+            for class_name, (module_path, bases, is_abstract) in classes.items()
+            if not is_abstract and class_name not in HANDLER_BASES and is_handler(class_name)
+        }
+
+    @staticmethod
+    def _has_abstract_methods(class_node):
+        for node in class_node.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for decorator in node.decorator_list:
+                    if (getattr(decorator, 'id', None) or getattr(decorator, 'attr', None)) == 'abstractmethod':
+                        return True
+        return False
@@ -0,0 +1,166 @@
+import copy
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from handlers.abstract_handler import single_step
+from handlers.handler import Handler
+from handlers.handler_factory import HandlerFactory
+from utils.text_stream import has_text_stream, materialize
+
+
+def merge_update(outputs: dict) -> dict:
+    """
+    Merges the branch outputs key by key; for keys set by several branches the last branch
+    (in depends_on order) wins.
+    """
+    merged = {}
+    for output in outputs.values():
+        merged.update(output)
+    return merged
+
+
+def merge_branches(outputs: dict) -> dict:
+    """
+    Keeps the text of every branch under request["branches"][node name] and joins them into
+    request["text"], so a writer after the join gets all results in one document.
+    """
+    merged = merge_update(outputs)
+    merged["branches"] = {name: output.get("text") for name, output in outputs.items()}
+
+    sections = []
+    for name, text in merged["branches"].items():
+        if text and not isinstance(text, str):
+            text = json.dumps(text, indent=2)
+        if text:
+            sections.append(f"## {name}\n\n{text}")
+    merged["text"] = "\n\n".join(sections)
+    return merged
+
+
+# Merge functions that can be referenced by name from a pipeline config
+MERGE_FUNCTIONS = {
+    "branches": merge_branches,
+    "update": merge_update,
+}
+
+
+class PipelineNode:
+
+    def __init__(self, name: str, handler: Handler = None, depends_on=(), merge=None):
+        self.name = name
+        self.handler = handler  # None for a pure join node
+        self.depends_on = list(depends_on)
+        self.merge = merge or merge_branches
+
+
+class Pipeline:
+    """
+    Runs handlers as a dependency graph instead of a linear chain. A node starts as soon as all
+    the nodes it depends on are done, so independent branches (e.g. insights and summarization of
+    the same text, or writing to S3, a local file and Quip) run concurrently and the end-to-end
+    latency is the critical path rather than the sum of all stages.
+
+    Every node works on its own copy of the request: a node with one dependency gets a copy of
+    that node's output, a node with several dependencies gets the result of its merge function
+    (see MERGE_FUNCTIONS). Handlers run one step at a time, the graph replaces set_next/get_next.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or int(os.getenv('PIPELINE_MAX_WORKERS', 8))
+        self.nodes = {}
+        self.timings = {}
+
+    def add(self, name: str, handler: Handler = None, depends_on=(), merge=None) -> "Pipeline":
+        if name in self.nodes:
+            raise ValueError(f"Duplicate pipeline node: {name}")
+        for dependency in depends_on:
+            if dependency not in self.nodes:
+                raise ValueError(f"Pipeline node {name} depends on unknown node: {dependency}")
+        if isinstance(merge, str):
+            if merge not in MERGE_FUNCTIONS:
+                raise ValueError(f"Unknown merge function for pipeline node {name}: {merge}")
+            merge = MERGE_FUNCTIONS[merge]
+        self.nodes[name] = PipelineNode(name, handler, depends_on, merge)
+        return self
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Pipeline":
+        """
+        Builds a pipeline from a config such as:
+        {"nodes": [{"name": "read", "handler": "LocalFileReaderHandler"},
+                   {"name": "insights", "handler": "AmazonComprehendInsightsHandler", "depends_on": ["read"]},
+                   ...]}
+        Nodes must be listed after the nodes they depend on.
+        """
+        pipeline = cls(max_workers=config.get("max_workers"))
+        for node in config["nodes"]:
+            handler = HandlerFactory.get_handler(node["handler"]) if node.get("handler") else None
+            pipeline.add(node["name"], handler, node.get("depends_on", ()), node.get("merge"))
+        return pipeline
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "Pipeline":
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return cls.from_config(json.load(f))
+
+    def run(self, request: dict) -> dict:
+        """
+        Runs the pipeline for the given request and returns the output of its final node. With several
+        final nodes (e.g. parallel writers) their outputs are merged with merge_update.
+        """
+        dependents = {name: [] for name in self.nodes}
+        for node in self.nodes.values():
+            for dependency in node.depends_on:
+                dependents[dependency].append(node.name)
+
+        outputs = {}
+        running = {}
+        self.timings = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as executor:
+            while len(outputs) < len(self.nodes):
+                for node in self.nodes.values():
+                    if node.name in outputs or node in running.values():
+                        continue
+                    if all(dependency in outputs for dependency in node.depends_on):
+                        running[executor.submit(self._run_node, node, self._node_input(node, request, outputs))] = node
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    output = future.result()
+                    # A stream can only be consumed once, so it is joined before being handed to several branches.
+                    if len(dependents[node.name]) > 1:
+                        materialize(output)
+                    outputs[node.name] = output
+
+        print(f"Pipeline finished in {time.perf_counter() - started:.2f}s "
+              f"(sum of stages {sum(self.timings.values()):.2f}s)")
+
+        sinks = [name for name in self.nodes if not dependents[name]]
+        if len(sinks) == 1:
+            return materialize(outputs[sinks[0]])
+        return merge_update({name: materialize(outputs[name]) for name in sinks})
+
+    def _node_input(self, node: PipelineNode, request: dict, outputs: dict) -> dict:
+        if not node.depends_on:
+            return copy.copy(request)
+        if len(node.depends_on) == 1:
+            return copy.copy(outputs[node.depends_on[0]])
+        return node.merge({name: copy.copy(materialize(outputs[name])) for name in node.depends_on})
+
+    def _run_node(self, node: PipelineNode, request: dict) -> dict:
+        started = time.perf_counter()
+        if node.handler:
+            print(f"Running pipeline node {node.name}...")
+            if has_text_stream(request) and not getattr(node.handler, 'supports_text_stream', False):
+                materialize(request)
+            token = single_step.set(True)
+            try:
+                request = node.handler.handle(request)
+            finally:
+                single_step.reset(token)
+        self.timings[node.name] = time.perf_counter() - started
+        return request
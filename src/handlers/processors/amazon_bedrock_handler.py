@@ -1,15 +1,17 @@
+import asyncio
 from utils.bedrock import invoke_model
 
-from handlers.abstract_handler import AbstractHandler
-class AmazonBedrockHandler(AbstractHandler):
+from handlers.abstract_handler import AbstractAsyncHandler
+class AmazonBedrockHandler(AbstractAsyncHandler):
     
-    def handle(self, request: dict) -> dict:
+    async def handle_async(self, request: dict) -> dict:
         print("Summarizing text with Bedrock...")
         
         text = request.get("text", None)
         
-        summary = invoke_model(text)
+        # boto3 has no native async client: the blocking invoke_model call is offloaded to the default
+        # thread pool, so the event loop stays free while the request is in flight.
+        summary = await asyncio.to_thread(invoke_model, text)
         
         request.update({"text":summary})
-        return super().handle(request)
-
+        return request
@@ -0,0 +1,107 @@
+import os
+import asyncio
+from utils.bedrock import invoke_model
+from utils.text_chunker import split_text, summarization_mode
+from handlers.abstract_handler import AbstractAsyncHandler
+from handlers.processors.prompt_handler import PromptHandler
+
+class AmazonBedrockMapReduceHandler(AbstractAsyncHandler):
+    """
+    Summarizes texts larger than the model context. The text is split into chunks that are
+    summarized in parallel (map), the partial summaries are then combined (reduce) - level by
+    level until they fit in one call - and the final prompt is applied to the result.
+    In "refine" mode the chunks are summarized sequentially, each step refining the running summary.
+    Replaces the PromptHandler + AmazonBedrockHandler pair in the chain.
+    """
+
+    async def handle_async(self, request: dict) -> dict:
+        self.prompts = PromptHandler()
+        self.chunk_size = int(os.getenv('AMAZON_BEDROCK_CHUNK_SIZE', 40000))
+        self.chunk_overlap = int(os.getenv('AMAZON_BEDROCK_CHUNK_OVERLAP', 200))
+        self.semaphore = asyncio.Semaphore(int(os.getenv('AMAZON_BEDROCK_MAX_CONCURRENCY', 4)))
+
+        # This handler only exists to split texts, so 'single' (the default mode) means map-reduce here.
+        mode = 'refine' if summarization_mode(request.get("summarize_mode")) == 'refine' else 'map_reduce'
+        text = request.get("text", None) or ""
+        prompt_file_name = request.get("prompt_file_name", "default_prompt")
+
+        chunks = split_text(text, self.chunk_size, self.chunk_overlap)
+        print(f"Summarizing text with Bedrock ({mode}, {len(chunks)} chunks)...")
+
+        if len(chunks) > 1:
+            if mode == 'refine':
+                refine_prompt_file_name = request.get("refine_prompt_file_name", "refine_prompt")
+                self.require_prompts(refine_prompt_file_name)
+                text = await self.refine(chunks, refine_prompt_file_name)
+            else:
+                map_prompt_file_name = request.get("map_prompt_file_name", "map_prompt")
+                reduce_prompt_file_name = request.get("reduce_prompt_file_name", "reduce_prompt")
+                self.require_prompts(map_prompt_file_name, reduce_prompt_file_name)
+                text = await self.map_reduce(chunks, map_prompt_file_name, reduce_prompt_file_name)
+
+        summary = await self.invoke(self.prompts.load_prompt(prompt_file_name, text))
+
+        request.update({"text": summary})
+        return request
+
+    async def map_reduce(self, chunks, map_prompt_file_name, reduce_prompt_file_name):
+        """
+        Summarizes all chunks concurrently, then reduces the partial summaries until they fit in a single chunk.
+        """
+        summaries = await self.summarize_all(chunks, map_prompt_file_name)
+
+        level = 1
+        combined = "\n\n".join(summaries)
+        while len(combined) > self.chunk_size and len(summaries) > 1:
+            print(f"Reducing {len(summaries)} partial summaries (level {level})...")
+            groups = self.group(summaries)
+            summaries = await self.summarize_all(["\n\n".join(group) for group in groups], reduce_prompt_file_name)
+            combined = "\n\n".join(summaries)
+            level += 1
+
+        return combined
+
+    async def refine(self, chunks, refine_prompt_file_name):
+        """
+        Summarizes the chunks in order, refining the running summary with each chunk.
+        """
+        summary = ""
+        for index, chunk in enumerate(chunks, start=1):
+            print(f"Refining summary with chunk {index}/{len(chunks)}...")
+            summary = await self.invoke(self.prompts.load_prompt(refine_prompt_file_name, chunk, existing_summary=summary))
+        return summary
+
+    async def summarize_all(self, texts, prompt_file_name):
+        """
+        Summarizes the texts concurrently (bounded by AMAZON_BEDROCK_MAX_CONCURRENCY), preserving their order.
+        """
+        return await asyncio.gather(*(self.invoke(self.prompts.load_prompt(prompt_file_name, text)) for text in texts))
+
+    def require_prompts(self, *prompt_file_names):
+        """
+        Fails before any model call when a per-level prompt file is missing. PromptHandler would fall back
+        to its generic prompt, which drops the running summary of refine and the intent of map and reduce.
+        """
+        for prompt_file_name in prompt_file_names:
+            if not os.path.isfile(PromptHandler.prompt_path(prompt_file_name)):
+                raise FileNotFoundError(f"Prompt file '{prompt_file_name}.txt' not found in ./prompts")
+
+    async def invoke(self, prompt):
+        async with self.semaphore:
+            result = await asyncio.to_thread(invoke_model, prompt)
+        return result if isinstance(result, str) else str(result or "")
+
+    def group(self, summaries):
+        """
+        Groups consecutive summaries so that each group fits in one chunk. Every group has at least
+        two summaries, so each reduce level at least halves their number.
+        """
+        groups = [[]]
+        size = 0
+        for summary in summaries:
+            if len(groups[-1]) >= 2 and size + len(summary) > self.chunk_size:
+                groups.append([])
+                size = 0
+            groups[-1].append(summary)
+            size += len(summary)
+        return groups
@@ -1,28 +1,37 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from handlers.abstract_handler import AbstractHandler
 from utils.aws_boto_client_manager import AWSBotoClientManager
 
 class AmazonComprehendInsightsHandler(AbstractHandler):
-    
+
     def handle(self, request: dict) -> dict:
 
         self.comprehend = AWSBotoClientManager.get_client('comprehend')
         self.max_bytes = 4000  # Amazon Comprehend's size limit of 5000kb for various operations
-        
+        self.batch_size = 25  # Maximum number of documents per Amazon Comprehend batch call
+        self.max_workers = int(os.getenv('COMPREHEND_MAX_CONCURRENCY', 6))
+
         print("Extracting insights from text...")
-        text = request.get("text", None)    
-        
+        text = request.get("text", None)
+
         if text:
             text_chunks = self.chunk_text(text)
-            sentiments = [self.detect_sentiment(chunk) for chunk in text_chunks]
-            entities = []
-            key_phrases = []
-            for chunk in text_chunks:
-                entities.extend(self.detect_entities(chunk))
-                key_phrases.extend(self.detect_key_phrases(chunk))
-            
+            batches = [text_chunks[i:i + self.batch_size] for i in range(0, len(text_chunks), self.batch_size)]
+
+            # Run the three analysis types over all batches concurrently; map() keeps the batch order.
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                sentiment_batches = executor.map(self.detect_sentiment_batch, batches)
+                entity_batches = executor.map(self.detect_entities_batch, batches)
+                key_phrase_batches = executor.map(self.detect_key_phrases_batch, batches)
+
+                sentiments = [sentiment for batch in sentiment_batches for sentiment in batch if sentiment]
+                entities = [entity for batch in entity_batches for chunk in batch for entity in chunk]
+                key_phrases = [phrase for batch in key_phrase_batches for chunk in batch for phrase in chunk]
+
             # Aggregate the insights and append to the request object
             request["text"] = {
-                "sentiment": max(set(sentiments), key=sentiments.count),  # Aggregation by most frequent sentiment
+                "sentiment": max(set(sentiments), key=sentiments.count) if sentiments else None,  # Aggregation by most frequent sentiment
                 "entities": entities,  # Entities from all chunks
                 "key_phrases": key_phrases  # Key phrases from all chunks
             }
@@ -51,41 +60,47 @@ class AmazonComprehendInsightsHandler(AbstractHandler):
                 current_size = word_size
         if current_chunk:
             chunks.append(" ".join(current_chunk))
-        
+
         return chunks
 
-    def detect_sentiment(self, text):
+    def detect_sentiment_batch(self, texts):
         """
-        Detects the sentiment of the given text using Amazon Comprehend.
+        Detects the sentiment of up to 25 texts with one Amazon Comprehend call. Returns one sentiment per text (None on error).
         """
-        try:
-            response = self.comprehend.detect_sentiment(Text=text, LanguageCode='en')
-            return response.get("Sentiment")
-        except Exception as e:
-            print(f"Error detecting sentiment: {e}")
-            return None
+        return [result.get("Sentiment") if result else None for result in self._batch_detect(self.comprehend.batch_detect_sentiment, texts, "sentiment")]
 
-    def detect_entities(self, text):
+    def detect_entities_batch(self, texts):
         """
-        Detects entities in the given text using Amazon Comprehend.
+        Detects entities in up to 25 texts with one Amazon Comprehend call. Returns one list of entities per text.
         """
-        try:
-            response = self.comprehend.detect_entities(Text=text, LanguageCode='en')
-            entities = response.get("Entities")
-            return [{"Text": entity["Text"], "Type": entity["Type"], "Score": entity["Score"]} for entity in entities]
-        except Exception as e:
-            print(f"Error detecting entities: {e}")
-            return []
+        return [
+            [{"Text": entity["Text"], "Type": entity["Type"], "Score": entity["Score"]} for entity in result.get("Entities", [])] if result else []
+            for result in self._batch_detect(self.comprehend.batch_detect_entities, texts, "entities")
+        ]
+
+    def detect_key_phrases_batch(self, texts):
+        """
+        Detects key phrases in up to 25 texts with one Amazon Comprehend call. Returns one list of key phrases per text.
+        """
+        return [
+            [{"Text": phrase["Text"], "Score": phrase["Score"]} for phrase in result.get("KeyPhrases", [])] if result else []
+            for result in self._batch_detect(self.comprehend.batch_detect_key_phrases, texts, "key phrases")
+        ]
 
-    def detect_key_phrases(self, text):
+    def _batch_detect(self, operation, texts, description):
         """
-        Detects key phrases in the given text using Amazon Comprehend.
+        Calls a Comprehend batch operation and returns the results in the order of the input texts,
+        with None for the documents that failed.
         """
+        results = [None] * len(texts)
         try:
-            response = self.comprehend.detect_key_phrases(Text=text, LanguageCode='en')
-            key_phrases = response.get("KeyPhrases")
-            return [{"Text": phrase["Text"], "Score": phrase["Score"]} for phrase in key_phrases]
+            response = operation(TextList=texts, LanguageCode='en')
         except Exception as e:
-            print(f"Error detecting key phrases: {e}")
-            return []
+            print(f"Error detecting {description}: {e}")
+            return results
 
+        for result in response.get("ResultList", []):
+            results[result["Index"]] = result
+        for error in response.get("ErrorList", []):
+            print(f"Error detecting {description} in chunk {error['Index']}: {error.get('ErrorMessage')}")
+        return results
@@ -1,17 +1,33 @@
 import os
 import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from handlers.abstract_handler import AbstractHandler
+from utils.concurrency import bounded_ordered_map
+from utils.text_chunker import split_text_spans, utf8_size
+from utils.text_stream import has_text_stream, iter_text, rechunk, set_text_stream
 from utils.aws_boto_client_manager import AWSBotoClientManager
 
 class AmazonComprehendPIITokenizeHandler(AbstractHandler):
+
+    supports_text_stream = True
     
     def handle(self, request: dict) -> dict:
         self.comprehend = AWSBotoClientManager.get_client('comprehend')
         self.storage_dir = os.getenv('DIR_STORAGE', './')  # Defaulting to current directory if not specified
         self.token_prefix = "T"  # Prefix for tokens
         self.token_counter = 1  # Starting point for token counter
+        self.max_bytes = int(os.getenv('COMPREHEND_PII_MAX_BYTES', 90000))  # detect_pii_entities accepts up to 100KB per call
+        self.max_workers = int(os.getenv('COMPREHEND_MAX_CONCURRENCY', 6))
         
         print("Starting PII Tokenization for specific types with shorter tokens...")
+        if has_text_stream(request):
+            # The token map is complete only once the stream is exhausted; its path is known up front.
+            token_map_file = self.token_map_path()
+            set_text_stream(request, self.tokenize_stream(iter_text(request), token_map_file))
+            request.update({"token_map": token_map_file})
+            return super().handle(request)
+
         text = request.get("text", None)
         
         pii_tokens, token_map = self.tokenize_pii(text)
@@ -37,42 +53,99 @@ class AmazonComprehendPIITokenizeHandler(AbstractHandler):
         """
         Detects and tokenizes specific PII data types in the given text using Amazon Comprehend.
         Filters for name, company name, phone, email, and address.
+        Texts above the Comprehend size limit are split at paragraph / sentence / word boundaries and the
+        chunks are analyzed in parallel; entity offsets are mapped back to offsets in the whole text.
         """
-        pii_entities = self.comprehend.detect_pii_entities(Text=text, LanguageCode='en')
+        spans = split_text_spans(text, self.max_bytes, size=utf8_size)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            chunk_entities = list(executor.map(lambda span: self.detect_pii_entities(text[span[0]:span[1]]), spans))
+
         pii_tokens = []
         token_map = {}
+        value_to_token = {}  # Reverse index, so finding the token of a known PII value is O(1)
         allowed_types = ['NAME', 'DATE', 'ADDRESS', 'PHONE', 'EMAIL']
-        for entity in pii_entities['Entities']:
-            if entity['Type'] in allowed_types:
-                start = entity['BeginOffset']
-                end = entity['EndOffset']
-                pii_text = text[start:end]
+        last_end = 0
+        for (chunk_start, _), entities in zip(spans, chunk_entities):
+            for entity in sorted(entities, key=lambda entity: entity['BeginOffset']):
+                if entity['Type'] in allowed_types:
+                    start = chunk_start + entity['BeginOffset']
+                    end = chunk_start + entity['EndOffset']
+                    if start < last_end:
+                        continue  # Overlaps the previous entity
+                    pii_text = text[start:end]
 
-                # Check if the PII text already has a token
-                token = next((t for t, v in token_map.items() if v == pii_text), None)
-                if not token:  # If not, generate a new token
+                    # Check if the PII text already has a token
+                    token = value_to_token.get(pii_text)
+                    if not token:  # If not, generate a new token
+                        token = self.generate_token()
+                        token_map[token] = pii_text
+                        value_to_token[pii_text] = token
+
+                    pii_tokens.append((start, end, token))
+                    last_end = end
+        return pii_tokens, token_map
+
+    def tokenize_stream(self, chunks, token_map_file):
+        """
+        Streaming counterpart of tokenize_pii() + replace_pii_with_tokens(): regroups the stream into
+        Comprehend-sized chunks, analyzes up to max_workers of them in parallel and yields the tokenized
+        chunks in order. The token map is written to token_map_file when the stream ends.
+        """
+        token_map = {}
+        value_to_token = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            detect = lambda chunk: (chunk, self.detect_pii_entities(chunk))
+            for chunk, entities in bounded_ordered_map(executor, detect, rechunk(chunks, self.max_bytes, size=utf8_size), self.max_workers):
+                pii_tokens = self.assign_tokens(chunk, entities, token_map, value_to_token)
+                yield self.replace_pii_with_tokens(chunk, pii_tokens)
+        self.store_token_map(token_map, token_map_file)
+
+    def assign_tokens(self, text, entities, token_map, value_to_token):
+        """
+        Returns the sorted, non-overlapping (start, end, token) replacements for the entities of one chunk.
+        """
+        allowed_types = ['NAME', 'DATE', 'ADDRESS', 'PHONE', 'EMAIL']
+        pii_tokens = []
+        last_end = 0
+        for entity in sorted(entities, key=lambda entity: entity['BeginOffset']):
+            if entity['Type'] in allowed_types and entity['BeginOffset'] >= last_end:
+                pii_text = text[entity['BeginOffset']:entity['EndOffset']]
+                token = value_to_token.get(pii_text)
+                if not token:
                     token = self.generate_token()
                     token_map[token] = pii_text
-                
-                pii_tokens.append((start, end, token))
-        return pii_tokens, token_map
+                    value_to_token[pii_text] = token
+                pii_tokens.append((entity['BeginOffset'], entity['EndOffset'], token))
+                last_end = entity['EndOffset']
+        return pii_tokens
+
+    def detect_pii_entities(self, text):
+        if not text.strip():
+            return []
+        return self.comprehend.detect_pii_entities(Text=text, LanguageCode='en')['Entities']
 
     def replace_pii_with_tokens(self, text, pii_tokens):
         """
-        Replaces PII in text with tokens.
+        Replaces PII in text with tokens, in a single pass. pii_tokens must be sorted by offset and not overlap.
         """
-        tokenized_text = text
-        offset = 0
+        parts = []
+        position = 0
         for start, end, token in pii_tokens:
-            tokenized_text = tokenized_text[:start + offset] + token + tokenized_text[end + offset:]
-            offset += len(token) - (end - start)
-        return tokenized_text
+            parts.append(text[position:start])
+            parts.append(token)
+            position = end
+        parts.append(text[position:])
+        return ''.join(parts)
+
+    def token_map_path(self):
+        # A unique name, so concurrent runs never overwrite each other's token maps.
+        return os.path.join(self.storage_dir, f"token_map_{uuid.uuid4().hex}.json")
 
-    def store_token_map(self, token_map):
+    def store_token_map(self, token_map, file_path=None):
         """
         Stores the token map in a JSON file and returns the file path.
         """
-        file_path = os.path.join(self.storage_dir, f"token_map_{self.generate_token()}.json")
+        file_path = file_path or self.token_map_path()
         with open(file_path, 'w') as file:
             json.dump(token_map, file)
         return file_path
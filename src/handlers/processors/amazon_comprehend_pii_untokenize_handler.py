@@ -1,6 +1,7 @@
 import os
 import json
 from handlers.abstract_handler import AbstractHandler
+from utils.token_replacer import TokenReplacer
 
 class AmazonComprehendPIIUntokenizeHandler(AbstractHandler):
     
@@ -38,8 +39,6 @@ class AmazonComprehendPIIUntokenizeHandler(AbstractHandler):
 
     def replace_tokens_with_pii(self, text, token_map):
         """
-        Replaces tokens in text with original PII values.
+        Replaces tokens in text with original PII values, in a single pass (see TokenReplacer).
         """
-        for token, pii_value in token_map.items():
-            text = text.replace(token, pii_value)
-        return text
+        return TokenReplacer(token_map).replace(text)
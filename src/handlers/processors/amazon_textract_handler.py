@@ -1,9 +1,12 @@
 # handlers/processors/textract_handler.py
 
+import os
 import sys
 import time
 from handlers.abstract_handler import AbstractHandler
 from utils.aws_boto_client_manager import AWSBotoClientManager
+from utils.polling import poll_delays
+from utils.textract_assembler import TextractTextAssembler
 
 class AmazonTextractHandler(AbstractHandler):
     
@@ -19,7 +22,9 @@ class AmazonTextractHandler(AbstractHandler):
             if path.startswith('s3://'):
                 
                 if key.endswith('.pdf'):
-                    text =  self._process_pdf(bucket, key)
+                    text, page_offsets = self._process_pdf(bucket, key)
+                    # Character offset at which each page starts in the text.
+                    request.update({"page_offsets": page_offsets})
                 else:
                     text =  self._process_image(bucket, key)
                 
@@ -54,18 +59,22 @@ class AmazonTextractHandler(AbstractHandler):
         job_id = response['JobId']
         print(f"Started job with id: {job_id}")
 
-        # Polling the job status
+        # Polling the job status, with exponential backoff and jitter
+        delays = poll_delays(
+            min_delay=float(os.getenv('TEXTRACT_POLL_MIN_SECONDS', 1)),
+            max_delay=float(os.getenv('TEXTRACT_POLL_MAX_SECONDS', 10)),
+        )
         while True:
+            time.sleep(next(delays))
             status_response = self.textract_client.get_document_text_detection(JobId=job_id)
             status = status_response['JobStatus']
             if status in ['SUCCEEDED', 'FAILED']:
                 break
-            time.sleep(5)  # Sleep between polls
 
         if status == 'SUCCEEDED':
             return self._parse_async_response(status_response, job_id)
         else:
-            return {'Error': 'Document text detection failed'}
+            return {'Error': 'Document text detection failed'}, []
 
     def parse_detect_document_text_response(self, response):
         """
@@ -111,30 +120,13 @@ class AmazonTextractHandler(AbstractHandler):
         return self.parse_detect_document_text_response(response)
 
     def _parse_async_response(self, initial_response, job_id):
-        # Initialize result pages list
-        pages = []
-
-        # Fetching all pages of results
-        next_token = None
-        while True:
-            response_options = {
-                'JobId': job_id
-            }
-            if next_token:
-                response_options['NextToken'] = next_token
-
-            response = self.textract_client.get_document_text_detection(**response_options)
-
-            pages.extend(response.get('Blocks', []))
-
-            next_token = response.get('NextToken', None)
-            if not next_token:
-                break
-
-        # Extract text from blocks
-        text = ''
-        for block in pages:
-            if block['BlockType'] == 'LINE':
-                text += block['Text'] + '\n'
-
-        return text
\ No newline at end of file
+        """
+        Assembles the text from all result pages, starting with the response of the last status poll
+        (it already holds the first page of blocks). Returns the text and the per-page offsets.
+        """
+        assembler = TextractTextAssembler()
+        assembler.add_response_pages(
+            initial_response,
+            lambda next_token: self.textract_client.get_document_text_detection(JobId=job_id, NextToken=next_token)
+        )
+        return assembler.get_text(), assembler.page_offsets
@@ -1,24 +1,28 @@
 import os
-import time
 import json
-from handlers.abstract_handler import AbstractHandler
+import uuid
+import asyncio
+from handlers.abstract_handler import AbstractAsyncHandler
 from utils.aws_boto_client_manager import AWSBotoClientManager
-class AmazonTranscriptionHandler(AbstractHandler):
+from utils.polling import poll_delays
+from utils.transcribe_completion import get_completion_source
+class AmazonTranscriptionHandler(AbstractAsyncHandler):
 
-    def handle(self, request: dict) -> dict:
+    async def handle_async(self, request: dict) -> dict:
         s3_file_path = request.get("path")
 
         print("Starting Amazon Transcribe job for: ", s3_file_path)
-        transcript = self.extract_transcript(s3_file_path)
+        transcript = await self.extract_transcript(s3_file_path, request.get("media_duration_seconds"))
 
         # updating the request body and adding the transcribed text.
         request.update({"text": transcript})
 
-        return super().handle(request)
+        return request
 
-    def extract_transcript(self, s3_file_path):
+    async def extract_transcript(self, s3_file_path, media_duration_seconds=None):
         """
         Orchestrates the transcription process for audio/video files, including summarization.
+        The blocking AWS calls are off-loaded to threads, the waiting happens on the event loop.
         """
 
         # Accessing variables from .env file
@@ -26,17 +30,17 @@ class AmazonTranscriptionHandler(AbstractHandler):
         OUTPUT_FOLDER = os.getenv('OUTPUT_FOLDER')
 
         # Start the transcription job
-        job_name, transcribe_client = self.start_transcribe_job(s3_file_path, BUCKET_NAME, OUTPUT_FOLDER)
+        job_name, transcribe_client = await asyncio.to_thread(self.start_transcribe_job, s3_file_path, BUCKET_NAME, OUTPUT_FOLDER)
         
         # Wait for the job to complete
-        job_status = self.wait_for_job_completion(transcribe_client, job_name)
+        job_status = await self.wait_for_job_completion(transcribe_client, job_name, media_duration_seconds, OUTPUT_FOLDER)
         
         if job_status['TranscriptionJob']['TranscriptionJobStatus'] == 'COMPLETED':
             # Fetch the transcript
-            transcript = self.fetch_transcript(BUCKET_NAME, job_name, OUTPUT_FOLDER)
+            transcript = await asyncio.to_thread(self.fetch_transcript, BUCKET_NAME, job_name, OUTPUT_FOLDER)
             
             # Delete the transcription job to clean up
-            self.delete_transcription_job(transcribe_client, job_name)
+            await asyncio.to_thread(self.delete_transcription_job, transcribe_client, job_name)
 
             return transcript
         else:
@@ -48,7 +52,8 @@ class AmazonTranscriptionHandler(AbstractHandler):
         """
         transcribe_client = AWSBotoClientManager.get_client('transcribe')
         
-        job_name = f"transcription_{int(time.time())}"
+        # Unique even when several jobs are started in the same second.
+        job_name = f"transcription_{uuid.uuid4().hex}"
         media_uri = s3_file_path
         media_format = s3_file_path.split('.')[-1]
         
@@ -64,15 +69,46 @@ class AmazonTranscriptionHandler(AbstractHandler):
         return job_name, transcribe_client
 
 
-    def wait_for_job_completion(self, transcribe_client, job_name):
+    async def wait_for_job_completion(self, transcribe_client, job_name, media_duration_seconds=None, output_folder=""):
         """
         Waits for the transcription job to complete and returns the job status.
+        With TRANSCRIBE_COMPLETION_MODE=sqs (or local) it waits for a completion event, otherwise it polls
+        with exponential backoff and jitter, timed on the expected duration of the job when the media
+        duration is known.
         """
+        completion_source = get_completion_source(output_folder)
+        if completion_source is not None:
+            return await self.wait_for_completion_event(completion_source, transcribe_client, job_name)
+
+        expected_seconds = None
+        if media_duration_seconds:
+            expected_seconds = float(media_duration_seconds) * float(os.getenv('TRANSCRIBE_EXPECTED_RATIO', 0.3))
+
+        delays = poll_delays(
+            expected_seconds,
+            min_delay=float(os.getenv('TRANSCRIBE_POLL_MIN_SECONDS', 2)),
+            max_delay=float(os.getenv('TRANSCRIBE_POLL_MAX_SECONDS', 30)),
+        )
+        while True:
+            await asyncio.sleep(next(delays))
+            status = await self.get_job_status(transcribe_client, job_name)
+            if status['TranscriptionJob']['TranscriptionJobStatus'] in ['COMPLETED', 'FAILED']:
+                return status
+
+    async def wait_for_completion_event(self, completion_source, transcribe_client, job_name):
+        """
+        Waits for the job's completion event. The job status is still checked every
+        TRANSCRIBE_EVENT_FALLBACK_SECONDS in case an event was lost (failed jobs produce no output object).
+        """
+        fallback_seconds = float(os.getenv('TRANSCRIBE_EVENT_FALLBACK_SECONDS', 120))
         while True:
-            status = transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
+            await asyncio.to_thread(completion_source.wait, job_name, fallback_seconds)
+            status = await self.get_job_status(transcribe_client, job_name)
             if status['TranscriptionJob']['TranscriptionJobStatus'] in ['COMPLETED', 'FAILED']:
                 return status
-            time.sleep(30)
+
+    async def get_job_status(self, transcribe_client, job_name):
+        return await asyncio.to_thread(transcribe_client.get_transcription_job, TranscriptionJobName=job_name)
 
     def fetch_transcript(self, BUCKET_NAME, job_name, OUTPUT_FOLDER):
         """
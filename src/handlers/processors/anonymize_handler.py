@@ -1,6 +1,7 @@
-import spacy
 import os
 from handlers.abstract_handler import AbstractHandler
+from utils.spacy_models import get_nlp
+from utils.text_chunker import split_text_spans
 
 class AnonymizeHandler(AbstractHandler):
     
@@ -17,14 +18,29 @@ class AnonymizeHandler(AbstractHandler):
     def anonymize_text(self, text, replacement="[Customer]"):
         """
         Anonymizes entities in the given text by replacing them with a specified replacement.
+        Large texts are split into paragraph-aligned chunks that spaCy processes in batches
+        (and optionally in several processes), and the entities are replaced by offset in one pass.
         """
+        if not text:
+            return text
 
-        # Load the spaCy model
-        nlp = spacy.load("en_core_web_sm")
+        # The spaCy model is loaded once per process
+        nlp = get_nlp(os.getenv('SPACY_MODEL', 'en_core_web_sm'))
 
-        doc = nlp(text)
-        anonymized_text = text
-        for ent in doc.ents:
-            if ent.label_ == "ORG":
-                anonymized_text = anonymized_text.replace(ent.text, replacement)
-        return anonymized_text    
\ No newline at end of file
+        spans = split_text_spans(text, int(os.getenv('ANONYMIZE_CHUNK_SIZE', 20000)))
+        docs = nlp.pipe(
+            (text[start:end] for start, end in spans),
+            batch_size=int(os.getenv('ANONYMIZE_BATCH_SIZE', 32)),
+            n_process=int(os.getenv('ANONYMIZE_N_PROCESS', 1)),
+        )
+
+        parts = []
+        position = 0
+        for (chunk_start, _), doc in zip(spans, docs):
+            for ent in doc.ents:
+                if ent.label_ == "ORG":
+                    parts.append(text[position:chunk_start + ent.start_char])
+                    parts.append(replacement)
+                    position = chunk_start + ent.end_char
+        parts.append(text[position:])
+        return ''.join(parts)
@@ -1,10 +1,17 @@
 import os
-from utils.web_utils import clean_html
+from utils.web_utils import clean_html, iter_clean_html
+from utils.text_stream import has_text_stream, iter_text, set_text_stream
 from handlers.abstract_handler import AbstractHandler
 class HTMLCleanerHandler(AbstractHandler):
+
+    supports_text_stream = True
         
     def handle(self, request: dict) -> dict:
         print("Cleaning HTML...")
+        if has_text_stream(request):
+            set_text_stream(request, iter_clean_html(iter_text(request)))
+            return super().handle(request)
+
         text = request.get("text")
         cleaned_tex = clean_html(text)
         request.update({"text": cleaned_tex})
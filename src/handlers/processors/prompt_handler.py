@@ -11,17 +11,22 @@ class PromptHandler(AbstractHandler):
         return super().handle(request)
 
 
-    def load_prompt(self, prompt_file_name, text):
+    def load_prompt(self, prompt_file_name, text, **variables):
         """
-        Loads a prompt from a file in the 'prompts' directory and formats it with the provided text.
+        Loads a prompt from a file in the 'prompts' directory and formats it with the provided text
+        and any additional template variables.
         """
-        prompt_file_path = os.path.join('./prompts', f'{prompt_file_name}.txt')
+        prompt_file_path = self.prompt_path(prompt_file_name)
         try:
             with open(prompt_file_path, 'r', encoding='utf-8') as file:
                 prompt_template = file.read()
-                formatted_prompt = prompt_template.format(input_text=text)
+                formatted_prompt = prompt_template.format(input_text=text, **variables)
                 return formatted_prompt
         except FileNotFoundError:
             print(f"Prompt file '{prompt_file_name}.txt' not found. Using default prompt.")
             default_prompt = "Please provide a summary of the following text: {input_text}"
-            return default_prompt.format(input_text=text)
\ No newline at end of file
+            return default_prompt.format(input_text=text)
+
+    @staticmethod
+    def prompt_path(prompt_file_name):
+        return os.path.join('./prompts', f'{prompt_file_name}.txt')
@@ -1,35 +1,222 @@
+import codecs
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from handlers.abstract_handler import AbstractHandler
+from handlers.handler_factory import HandlerFactory
+from utils.concurrency import bounded_ordered_map
+from utils.text_stream import is_streaming_enabled, set_text_stream
 from utils.aws_boto_client_manager import AWSBotoClientManager
+
+# Objects read by another reader from an in-memory copy instead of being decoded as text
+BINARY_EXTENSIONS = {
+    '.pdf': 'pdf',
+    '.docx': 'microsoft_word',
+    '.xlsx': 'microsoft_excel', '.xlsm': 'microsoft_excel', '.xltx': 'microsoft_excel', '.xltm': 'microsoft_excel',
+}
+TEXT_EXTENSIONS = ('.txt', '.json', '.jsonl', '.csv', '.tsv', '.md', '.log', '.xml', '.html', '.htm', '.yaml', '.yml')
+PDF_MAGIC = b'%PDF'
+ZIP_MAGIC = b'PK\x03\x04'
+
+
+def office_format(fileobj):
+    """
+    Tells a Word document from an Excel workbook by the parts of the zip package; None for any other archive.
+    """
+    try:
+        # ZipFile leaves a file object it did not open alone when it is closed.
+        with zipfile.ZipFile(fileobj) as archive:
+            names = archive.namelist()
+    except zipfile.BadZipFile:
+        return None
+    if any(name.startswith('word/') for name in names):
+        return 'microsoft_word'
+    if any(name.startswith('xl/') for name in names):
+        return 'microsoft_excel'
+    return None
+
+
 class AmazonS3ReaderHandler(AbstractHandler):
+    """
+    Reads text from S3. Objects larger than S3_READ_PART_SIZE are fetched with concurrent byte-range GETs
+    (S3_READ_CONCURRENCY in flight) and decoded incrementally. PDF, Word and Excel objects, recognized by
+    their extension or their first bytes, are downloaded into a spooled buffer (in memory up to
+    S3_SPOOL_MAX_SIZE) and read by the matching reader. A path ending with '/' (s3://bucket/prefix/)
+    ingests every object under the prefix, S3_PREFIX_CONCURRENCY objects at a time, each introduced by a
+    "## Object: s3://bucket/key" line.
+    """
 
     def handle(self, request: dict) -> dict:
         # Extract the S3 object path from the request
         s3_object_path = request.get("path")
-        
+
         s3_bucket, s3_object = self.parse_s3_path(s3_object_path)
 
 
         print(f"Reading content from s3://{s3_bucket}/{s3_object}")
 
-        file_content = self.read_file_content_from_s3(s3_object, s3_bucket)
-        
-        # Update request with the file content
-        request.update({"text": file_content})
-        
-        print("REQUEST IS:", request)
+        if not s3_object or s3_object.endswith('/'):
+            chunks = self.iter_prefix_content_from_s3(s3_object, s3_bucket)
+        else:
+            size = self.object_size(s3_object, s3_bucket)
+            input_format = self.detect_format(s3_object, s3_bucket, size)
+            if input_format == 'text':
+                chunks = self.iter_file_content_from_s3(s3_object, s3_bucket, size)
+            else:
+                text, page_offsets = self.read_binary_object(s3_object, s3_bucket, input_format, size)
+                if page_offsets is not None:
+                    request.update({"page_offsets": page_offsets})
+                chunks = [text]
+
+        if is_streaming_enabled():
+            # Hand the parts over as they are decoded instead of reading everything into memory.
+            set_text_stream(request, chunks)
+        else:
+            # Update request with the file content
+            request.update({"text": ''.join(chunks)})
+
         return super().handle(request)
 
-    def read_file_content_from_s3(self, s3_object, bucket_name):
+    def read_file_content_from_s3(self, s3_object, bucket_name, size=None):
+        """
+        Reads file content from an S3 bucket and returns it as a string, using the reader that matches
+        the object's format.
+        """
+        if size is None:
+            size = self.object_size(s3_object, bucket_name)
+        input_format = self.detect_format(s3_object, bucket_name, size)
+        if input_format == 'text':
+            return ''.join(self.iter_file_content_from_s3(s3_object, bucket_name, size))
+        return self.read_binary_object(s3_object, bucket_name, input_format, size)[0]
+
+    def iter_file_content_from_s3(self, s3_object, bucket_name, size=None):
+        """
+        Yields the file content of an S3 object as text, decoding the parts of iter_object_bytes()
+        incrementally, so a character split across two ranges is decoded whole.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        for data in self.iter_object_bytes(s3_object, bucket_name, size):
+            yield decoder.decode(data)
+        yield decoder.decode(b'', final=True)
+
+    def iter_object_bytes(self, s3_object, bucket_name, size=None):
+        """
+        Yields the bytes of an S3 object, one part per S3_READ_PART_SIZE byte range. The ranges are fetched
+        concurrently but yielded in order, with at most S3_READ_CONCURRENCY parts held in memory. The object
+        size is looked up with head_object unless it is passed in (e.g. from a listing).
+        """
+        s3_client = AWSBotoClientManager.get_client('s3')
+        part_size = int(os.getenv('S3_READ_PART_SIZE', 8 * 1024 * 1024))
+        concurrency = int(os.getenv('S3_READ_CONCURRENCY', 8))
+
+        if size is None:
+            size = self.object_size(s3_object, bucket_name)
+
+        if size <= part_size or concurrency <= 1:
+            body = s3_client.get_object(Bucket=bucket_name, Key=s3_object)['Body']
+            yield from body.iter_chunks(chunk_size=part_size)
+            return
+
+        def get_range(start):
+            end = min(start + part_size, size) - 1
+            result = s3_client.get_object(Bucket=bucket_name, Key=s3_object, Range=f"bytes={start}-{end}")
+            return result['Body'].read()
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="s3-range") as executor:
+            yield from bounded_ordered_map(executor, get_range, range(0, size, part_size), concurrency)
+
+    def detect_format(self, s3_object, bucket_name, size=None):
+        """
+        Returns the input type of an object ('pdf', 'microsoft_word', 'microsoft_excel', 'zip' or 'text'):
+        from the key's extension, or else from its first bytes, which costs one small ranged GET.
+        An empty object is text (S3 rejects a range on it). 'zip' is resolved into Word or Excel once
+        the object is downloaded (see office_format()).
+        """
+        extension = os.path.splitext(s3_object)[1].lower()
+        if extension in BINARY_EXTENSIONS:
+            return BINARY_EXTENSIONS[extension]
+        if extension in TEXT_EXTENSIONS:
+            return 'text'
+
+        if size is None:
+            size = self.object_size(s3_object, bucket_name)
+        if size == 0:
+            return 'text'
+
+        s3_client = AWSBotoClientManager.get_client('s3')
+        head = s3_client.get_object(Bucket=bucket_name, Key=s3_object, Range="bytes=0-7")['Body'].read()
+        if head.startswith(PDF_MAGIC):
+            return 'pdf'
+        if head.startswith(ZIP_MAGIC):
+            return 'zip'
+        return 'text'
+
+    def object_size(self, s3_object, bucket_name):
+        s3_client = AWSBotoClientManager.get_client('s3')
+        return s3_client.head_object(Bucket=bucket_name, Key=s3_object)['ContentLength']
+
+    def download_object(self, s3_object, bucket_name, size=None):
+        """
+        Downloads an object with the concurrent ranged GETs of iter_object_bytes() into a spooled buffer,
+        kept in memory up to S3_SPOOL_MAX_SIZE bytes and rolled over to a temporary file past that.
+        """
+        buffer = tempfile.SpooledTemporaryFile(max_size=int(os.getenv('S3_SPOOL_MAX_SIZE', 64 * 1024 * 1024)))
+        for data in self.iter_object_bytes(s3_object, bucket_name, size):
+            buffer.write(data)
+        buffer.seek(0)
+        return buffer
+
+    def read_binary_object(self, s3_object, bucket_name, input_format, size=None):
+        """
+        Reads a PDF, Word or Excel object with its reader, from an in-memory copy of the object.
+        Returns the text and, for a PDF, the page offsets (None otherwise).
+        """
+        with self.download_object(s3_object, bucket_name, size) as buffer:
+            if input_format == 'zip':
+                input_format = office_format(buffer)
+                if input_format is None:
+                    raise ValueError(f"s3://{bucket_name}/{s3_object} is a zip archive, but not a Word or Excel document")
+                buffer.seek(0)
+
+            print(f"Reading s3://{bucket_name}/{s3_object} as {input_format}")
+            if input_format == 'pdf':
+                return HandlerFactory.get_handler("PDFReaderHandler").read_pdf(buffer)
+            if input_format == 'microsoft_word':
+                return HandlerFactory.get_handler("MicrosoftWordReaderHandler").read_document(buffer), None
+            return HandlerFactory.get_handler("MicrosoftExcelReaderHandler").read_workbook(buffer), None
+
+    def iter_prefix_content_from_s3(self, prefix, bucket_name):
+        """
+        Yields the text of every object under the prefix, in key order. Objects are read concurrently,
+        S3_PREFIX_CONCURRENCY at a time; an object that cannot be read or decoded is reported and skipped.
+        """
+        concurrency = int(os.getenv('S3_PREFIX_CONCURRENCY', 16))
+
+        def read_object(item):
+            key, size = item
+            try:
+                return f"## Object: s3://{bucket_name}/{key}\n" + self.read_file_content_from_s3(key, bucket_name, size).strip() + "\n\n"
+            except Exception as e:
+                print(f"Error reading s3://{bucket_name}/{key}: {e}")
+                return ""
+
+        objects = self.list_objects(prefix, bucket_name)
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="s3-object") as executor:
+            yield from bounded_ordered_map(executor, read_object, objects, concurrency)
+
+    def list_objects(self, prefix, bucket_name):
         """
-        Reads file content from an S3 bucket and returns it as a string.
+        Yields the (key, size) of the objects under the prefix page by page, skipping folder placeholders.
         """
         s3_client = AWSBotoClientManager.get_client('s3')
-        s3_object = s3_client.get_object(Bucket=bucket_name, Key=s3_object)
-        file_content = s3_object['Body'].read().decode('utf-8')
-        
-        return file_content
+        paginator = s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for item in page.get('Contents', []):
+                if not item['Key'].endswith('/'):
+                    yield item['Key'], item['Size']
 
     def parse_s3_path(self, s3_path):
-        # Assumes s3_path format is "s3://bucket-name/path/to/object"
-        _, _, bucket_name, object_key = s3_path.split('/', 3)
-        return bucket_name, object_key
\ No newline at end of file
+        # Assumes s3_path format is "s3://bucket-name/path/to/object" or "s3://bucket-name/prefix/"
+        _, _, bucket_name, *object_key = s3_path.split('/', 3)
+        return bucket_name, object_key[0] if object_key else ''
@@ -1,12 +1,17 @@
 from typing import Any
 from handlers.abstract_handler import AbstractHandler
+from utils.text_stream import is_streaming_enabled, set_text_stream, stream_chunk_size
 class LocalFileReaderHandler(AbstractHandler):
     
     def handle(self, request: dict) -> dict:
         print("Processing local file...")
         file_path = request.get("path")
-        text = self.read_text_content(file_path)
-        request.update({"text": text})
+        if is_streaming_enabled():
+            # Hand the file over chunk by chunk instead of reading it into memory.
+            set_text_stream(request, self.iter_text_content(file_path))
+        else:
+            text = self.read_text_content(file_path)
+            request.update({"text": text})
 
         return super().handle(request)
     
@@ -19,4 +24,16 @@ class LocalFileReaderHandler(AbstractHandler):
                 return f.read()
         except Exception as e:
             print(f"Error reading file {file_path}: {e}")
-            return ""
\ No newline at end of file
+            return ""
+
+    def iter_text_content(self, file_path, chunk_size=None):
+        """
+        Yields the content of a text or JSON file in chunks of TEXT_STREAM_CHUNK_SIZE characters.
+        """
+        chunk_size = chunk_size or stream_chunk_size()
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for chunk in iter(lambda: f.read(chunk_size), ''):
+                    yield chunk
+        except Exception as e:
+            print(f"Error reading file {file_path}: {e}")
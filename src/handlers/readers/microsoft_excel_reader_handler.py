@@ -1,27 +1,119 @@
+import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor
 from openpyxl import load_workbook
 from handlers.abstract_handler import AbstractHandler
 
+# Written instead of a value that repeats the value of the cell above (e.g. a region column)
+DITTO = '"'
+DELIMITER = ' | '
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time(0):
+        return value.date().isoformat()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    # Keep one row per line and the delimiter unambiguous
+    return str(value).replace('\n', ' ').replace('|', '/').strip()
+
+
+def format_rows(rows, max_rows=0):
+    """
+    Yields the lines of one sheet: the header (the first non-empty row) once, then one line per
+    non-empty row, values separated by DELIMITER and values equal to the one above replaced by DITTO.
+    Trailing empty cells are dropped. With max_rows, rows past the limit are counted but not emitted.
+    """
+    header = None
+    previous = []
+    emitted = 0
+    skipped = 0
+    for row in rows:
+        values = [format_value(value) for value in row]
+        while values and not values[-1]:
+            values.pop()
+        if not values:
+            continue
+
+        if header is None:
+            header = values
+            yield DELIMITER.join(values)
+            continue
+
+        if max_rows and emitted >= max_rows:
+            skipped += 1
+            continue
+
+        line = [DITTO if value and index < len(previous) and value == previous[index] else value for index, value in enumerate(values)]
+        previous = values
+        emitted += 1
+        yield DELIMITER.join(line)
+
+    if skipped:
+        yield f"[{skipped} more rows not shown]"
+
+
+def read_sheet(worksheet, max_rows=0):
+    """
+    Returns the text of one read-only worksheet, or '' when it is empty.
+    """
+    # Some writers store a wrong dimension, which makes read-only sheets stop early; read the real extent.
+    worksheet.reset_dimensions()
+    lines = list(format_rows(worksheet.iter_rows(values_only=True), max_rows))
+    if not lines:
+        return ''
+    return f"## Sheet: {worksheet.title}\n" + '\n'.join(lines)
+
+
+def read_sheet_from_file(path, sheet_name, max_rows=0):
+    """
+    Opens the workbook and reads a single sheet; runs in a worker process when sheets are read in parallel.
+    """
+    workbook = load_workbook(filename=path, read_only=True, data_only=True)
+    try:
+        return read_sheet(workbook[sheet_name], max_rows)
+    finally:
+        workbook.close()
+
+
 class MicrosoftExcelReaderHandler(AbstractHandler):
 
     def handle(self, request: dict) -> dict:
         print("Processing Excel file...")
 
-        # Initialize a variable to hold the extracted text
-        text_content = ''
-
-        # Load the workbook and select the first worksheet
-        workbook = load_workbook(filename=request.get("path", None))
-        worksheet = workbook.active
-
-        # Iterate through each row and cell to extract text
-        for row in worksheet.iter_rows(values_only=True):
-            for cell in row:
-                if cell is not None:  # Check if the cell is not empty
-                    text_content += str(cell) + ' '
-            text_content += '\n'  # Add a newline after each row
+        # Extract the text of every sheet of the workbook
+        text_content = self.read_workbook(request.get("path", None))
 
         # Update the request with the extracted text
         request.update({"text": text_content})
 
         # Call the next handler in the chain
         return super().handle(request)
+
+    def read_workbook(self, source):
+        """
+        Returns a compact text rendering of all sheets of a workbook, given as a path or a binary file-like object.
+        The workbook is opened read-only, so rows are streamed instead of being loaded into memory at once.
+        EXCEL_MAX_ROWS_PER_SHEET caps the rows per sheet (0 = no limit); with EXCEL_SHEET_WORKERS > 1, the
+        sheets of a workbook on disk are read in parallel worker processes.
+        """
+        max_rows = int(os.getenv('EXCEL_MAX_ROWS_PER_SHEET', 0))
+        max_workers = int(os.getenv('EXCEL_SHEET_WORKERS', 1))
+
+        workbook = load_workbook(filename=source, read_only=True, data_only=True)
+        try:
+            if max_workers > 1 and isinstance(source, (str, os.PathLike)) and len(workbook.sheetnames) > 1:
+                sheet_names = [worksheet.title for worksheet in workbook.worksheets]
+                workbook.close()
+                with ProcessPoolExecutor(max_workers=min(max_workers, len(sheet_names))) as executor:
+                    sheets = list(executor.map(read_sheet_from_file, [source] * len(sheet_names), sheet_names, [max_rows] * len(sheet_names)))
+            else:
+                sheets = [read_sheet(worksheet, max_rows) for worksheet in workbook.worksheets]
+        finally:
+            workbook.close()
+
+        return '\n\n'.join(sheet for sheet in sheets if sheet)
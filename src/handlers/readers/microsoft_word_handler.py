@@ -1,31 +1,91 @@
+import re
 from docx import Document
+from docx.oxml.ns import qn
 from handlers.abstract_handler import AbstractHandler
 
+# Written for a vertically merged cell continuing the cell above
+DITTO = '"'
+DELIMITER = ' | '
+
+PARAGRAPH, TABLE, ROW, CELL, SDT, SDT_CONTENT = qn('w:p'), qn('w:tbl'), qn('w:tr'), qn('w:tc'), qn('w:sdt'), qn('w:sdtContent')
+TEXT, TAB, BREAK, CARRIAGE_RETURN = qn('w:t'), qn('w:tab'), qn('w:br'), qn('w:cr')
+HEADING_STYLE = re.compile(r'^Heading(\d)$')
+
+
 class MicrosoftWordReaderHandler(AbstractHandler):
-    
+
     def handle(self, request: dict) -> dict:
         print("Processing DOCX file...")
 
-        # Initialize a variable to hold the extracted text
-        text_content = ''
-
-        # Load the document from the path specified in the request
-        doc = Document(request.get("path", None))
-
-        # Iterate through each paragraph in the document to extract text
-        for para in doc.paragraphs:
-            text_content += para.text + '\n'
-        
-        # Also extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    # Iterate through paragraphs inside each cell
-                    for paragraph in cell.paragraphs:
-                        text_content += paragraph.text + '\n'
+        # Extract the text of the paragraphs and tables, in document order
+        text_content = self.read_document(request.get("path", None))
 
         # Update the request with the extracted text
         request.update({"text": text_content})
 
         # Call the next handler in the chain
         return super().handle(request)
+
+    def read_document(self, source):
+        """
+        Returns the text of a .docx document, given as a path or a binary file-like object. The body XML is
+        walked once, so paragraphs and tables come out in document order. Headings are prefixed with '#',
+        list items with '-', and tables are rendered one '|'-separated line per row with merged cells written once.
+        """
+        document = Document(source)
+        lines = []
+        self._read_blocks(document.element.body, lines)
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def _read_blocks(self, parent, lines):
+        for element in parent.iterchildren():
+            if element.tag == PARAGRAPH:
+                text = self._paragraph_text(element)
+                if text:
+                    lines.append(self._paragraph_prefix(element) + text)
+            elif element.tag == TABLE:
+                self._read_table(element, lines)
+            elif element.tag == SDT:
+                # Content controls wrap regular paragraphs and tables
+                for content in element.iterchildren(SDT_CONTENT):
+                    self._read_blocks(content, lines)
+
+    def _read_table(self, table, lines):
+        for row in table.iterchildren(ROW):
+            cells = []
+            for cell in row.iterchildren(CELL):
+                # A horizontally merged cell (gridSpan) is a single w:tc, a vertically merged one
+                # is an empty w:tc with <w:vMerge/> under the cell that holds the text.
+                v_merge = cell.find(f"{qn('w:tcPr')}/{qn('w:vMerge')}")
+                if v_merge is not None and v_merge.get(qn('w:val'), 'continue') == 'continue':
+                    cells.append(DITTO)
+                else:
+                    cells.append(' '.join(filter(None, (self._paragraph_text(paragraph) for paragraph in cell.iter(PARAGRAPH)))))
+            if any(cell and cell != DITTO for cell in cells):
+                lines.append(DELIMITER.join(cells))
+        lines.append('')
+
+    @staticmethod
+    def _paragraph_text(paragraph):
+        parts = []
+        for node in paragraph.iter(TEXT, TAB, BREAK, CARRIAGE_RETURN):
+            if node.tag == TEXT:
+                parts.append(node.text or '')
+            elif node.tag == TAB:
+                parts.append('\t')
+            else:
+                parts.append('\n')
+        return ''.join(parts).strip()
+
+    @staticmethod
+    def _paragraph_prefix(paragraph):
+        properties = paragraph.find(qn('w:pPr'))
+        if properties is None:
+            return ''
+        style = properties.find(qn('w:pStyle'))
+        heading = HEADING_STYLE.match(style.get(qn('w:val'), '')) if style is not None else None
+        if heading:
+            return '#' * int(heading.group(1)) + ' '
+        if properties.find(qn('w:numPr')) is not None or (style is not None and style.get(qn('w:val'), '').startswith('List')):
+            return '- '
+        return ''
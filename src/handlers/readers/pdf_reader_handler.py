@@ -1,12 +1,232 @@
-from pdfminer.high_level import extract_text
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import PDFObjRef, PDFStream
 from handlers.abstract_handler import AbstractHandler
+from utils.pdf_page_cache import PDFPageCache
+
+
+def get_laparams():
+    """
+    The pdfminer layout analysis parameters: PDF_LAPARAMS (a JSON object of LAParams arguments) tunes them,
+    PDF_LAYOUT_ANALYSIS=false turns layout analysis off (much faster, text in content stream order).
+    Returns None when layout analysis is off.
+    """
+    if os.getenv('PDF_LAYOUT_ANALYSIS', 'true').lower() not in ('true', '1', 't'):
+        return None
+    return json.loads(os.getenv('PDF_LAPARAMS') or '{}')
+
+
+def default_max_workers():
+    """
+    The number of worker processes for one document: PDF_MAX_WORKERS, or else one per CPU when the document is
+    read on the main thread of the main process. A caller that already reads documents in parallel (batch.py
+    worker processes, the threads of S3 prefix ingestion or of a pipeline) would multiply that by its own
+    parallelism, so there the pages are extracted inline unless PDF_MAX_WORKERS is set.
+    """
+    if os.getenv('PDF_MAX_WORKERS'):
+        return int(os.getenv('PDF_MAX_WORKERS'))
+    if multiprocessing.parent_process() is not None or threading.current_thread() is not threading.main_thread():
+        return 1
+    return os.cpu_count() or 1
+
+
+@contextlib.contextmanager
+def open_source(source):
+    """
+    Opens a PDF given as a path, or rewinds a binary file-like object (which is left open for the caller).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield f
+    else:
+        source.seek(0)
+        yield source
+
+
+# Bytes of the in-memory document being extracted, set once per worker process (see extract_missing_pages)
+_worker_document = None
+
+
+def _set_worker_document(data):
+    global _worker_document
+    _worker_document = data
+
+
+def extract_worker_document_pages(page_numbers, laparams):
+    return extract_pages(io.BytesIO(_worker_document), page_numbers, laparams)
+
+
+def extract_pages(source, page_numbers, laparams):
+    """
+    Extracts the text of the given (0-based) pages of a PDF path or file-like object; runs in a worker
+    process. Each page's text ends with a form feed, like pdfminer's extract_text().
+    """
+    resource_manager = PDFResourceManager(caching=True)
+    output = io.StringIO()
+    device = TextConverter(resource_manager, output, laparams=LAParams(**laparams) if laparams is not None else None)
+    interpreter = PDFPageInterpreter(resource_manager, device)
+
+    texts = {}
+    with open_source(source) as f:
+        for page_number, page in enumerate(PDFPage.get_pages(f)):
+            if page_number not in page_numbers:
+                continue
+            interpreter.process_page(page)
+            texts[page_number] = output.getvalue()
+            output.seek(0)
+            output.truncate()
+            if len(texts) == len(page_numbers):
+                break
+    device.close()
+    return texts
+
+
+class PDFObjectHasher:
+    """
+    Hashes PDF objects by value, following indirect references, so two pages get the same digest only when
+    everything that renders their text is the same: content streams, fonts (with their encodings, ToUnicode
+    maps and embedded font files), form XObjects and the other resources. Each indirect object is hashed once
+    per document, so fonts and XObjects shared by many pages do not slow down the keys of every page.
+    """
+
+    def __init__(self):
+        self._digests = {}  # object id -> digest, None while the object is being hashed
+
+    def digest(self, obj):
+        if isinstance(obj, PDFObjRef):
+            if obj.objid in self._digests:
+                # A reference back to an object being hashed (e.g. an annotation's /P page) ends the walk.
+                return self._digests[obj.objid] or b'cycle'
+            self._digests[obj.objid] = None
+            digest = self._digests[obj.objid] = self.digest(obj.resolve())
+            return digest
+
+        digest = hashlib.sha256()
+        if isinstance(obj, PDFStream):
+            digest.update(b'stream')
+            digest.update(self.digest(obj.attrs))
+            digest.update(obj.get_rawdata() or obj.get_data())
+        elif isinstance(obj, dict):
+            digest.update(b'dict')
+            for key in sorted(obj, key=str):
+                digest.update(repr(key).encode('utf-8'))
+                digest.update(self.digest(obj[key]))
+        elif isinstance(obj, (list, tuple)):
+            digest.update(b'list')
+            for item in obj:
+                digest.update(self.digest(item))
+        else:
+            digest.update(repr(obj).encode('utf-8'))
+        return digest.digest()
+
+
 class PDFReaderHandler(AbstractHandler):
-    
+
     def handle(self, request: dict) -> dict:
         print("Processing PDF file...")
 
-        text_content = extract_text(request.get("path", None))
+        text_content, page_offsets = self.read_pdf(request.get("path", None))
 
-        request.update({"text":text_content})
+        # Character offset at which each page starts in the text.
+        request.update({"text": text_content, "page_offsets": page_offsets})
 
         return super().handle(request)
+
+    def read_pdf(self, source, max_workers=None):
+        """
+        Extracts the text of a PDF, given as a path or a binary file-like object, page by page. Pages already
+        extracted with the same layout parameters are read from the page cache (keyed on the page content, so a
+        partially changed document only extracts its changed pages); the others are split into page ranges
+        extracted in parallel worker processes (max_workers, by default see default_max_workers(); PDF_PAGES_PER_TASK).
+        Returns the text and the offset at which each page starts.
+        """
+        laparams = get_laparams()
+        cache = PDFPageCache.get_default()
+
+        texts = {}
+        if cache is not None:
+            page_keys = self.page_keys(source, laparams)
+            page_count = len(page_keys)
+            for page_number, key in enumerate(page_keys):
+                text = cache.get(key)
+                if text is not None:
+                    texts[page_number] = text
+        else:
+            # Without the cache the keys are not needed: counting the pages does not decode any stream.
+            page_count = self.page_count(source)
+
+        missing = [page_number for page_number in range(page_count) if page_number not in texts]
+        if missing:
+            print(f"Extracting {len(missing)} of {page_count} pages...")
+            extracted = self.extract_missing_pages(source, missing, laparams, max_workers)
+            texts.update(extracted)
+            if cache is not None:
+                for page_number, text in extracted.items():
+                    cache.put(page_keys[page_number], text)
+
+        parts = []
+        page_offsets = []
+        offset = 0
+        for page_number in range(page_count):
+            page_offsets.append({"page": page_number + 1, "offset": offset})
+            parts.append(texts.get(page_number, ''))
+            offset += len(parts[-1])
+        return ''.join(parts), page_offsets
+
+    def extract_missing_pages(self, source, page_numbers, laparams, max_workers=None):
+        max_workers = max_workers or default_max_workers()
+        pages_per_task = int(os.getenv('PDF_PAGES_PER_TASK', 8))
+        ranges = [set(page_numbers[i:i + pages_per_task]) for i in range(0, len(page_numbers), pages_per_task)]
+
+        # Daemonic processes (e.g. multiprocessing.Pool workers) cannot start a pool of their own.
+        if max_workers <= 1 or len(ranges) == 1 or multiprocessing.current_process().daemon:
+            return extract_pages(source, set(page_numbers), laparams)
+
+        texts = {}
+        if isinstance(source, (str, os.PathLike)):
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(ranges))) as executor:
+                for extracted in executor.map(extract_pages, [source] * len(ranges), ranges, [laparams] * len(ranges)):
+                    texts.update(extracted)
+        else:
+            # An in-memory document is sent to each worker once, when it starts, instead of with every page range.
+            with open_source(source) as f:
+                data = f.read()
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(ranges)), initializer=_set_worker_document, initargs=(data,)) as executor:
+                for extracted in executor.map(extract_worker_document_pages, ranges, [laparams] * len(ranges)):
+                    texts.update(extracted)
+        return texts
+
+    @staticmethod
+    def page_keys(source, laparams):
+        """
+        Returns one cache key per page: a hash of the layout parameters and of the page's fully resolved object
+        graph (content streams, resources with fonts and XObjects, page boxes and rotation), see PDFObjectHasher.
+        """
+        settings = json.dumps(laparams, sort_keys=True).encode('utf-8')
+        keys = []
+        with open_source(source) as f:
+            hasher = PDFObjectHasher()
+            document = PDFDocument(PDFParser(f))
+            for page in PDFPage.create_pages(document):
+                digest = hashlib.sha256(settings)
+                # page.resources, mediabox, cropbox and rotate include the attributes inherited from the page tree.
+                digest.update(hasher.digest([page.contents, page.resources, page.mediabox, page.cropbox, page.rotate]))
+                keys.append(digest.hexdigest())
+        return keys
+
+    @staticmethod
+    def page_count(source):
+        with open_source(source) as f:
+            return sum(1 for _ in PDFPage.create_pages(PDFDocument(PDFParser(f))))
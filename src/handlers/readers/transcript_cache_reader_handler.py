@@ -0,0 +1,43 @@
+from handlers.abstract_handler import AbstractHandler
+from handlers.handler import Handler
+from utils.hashing import file_sha256
+from utils.transcript_store import TranscriptStore, youtube_video_id
+
+class TranscriptCacheReaderHandler(AbstractHandler):
+    """
+    Looks up the transcript of a media file (by content hash) or YouTube video (by video id).
+    On a hit the request skips straight to the skip target, bypassing the download, S3 upload
+    and Amazon Transcribe stages.
+    """
+
+    _skip_target: Handler = None
+
+    def set_skip_target(self, handler: Handler) -> Handler:
+        self._skip_target = handler
+        return handler
+
+    def get_next(self, request: dict) -> Handler:
+        if request.get("transcript_cache_hit"):
+            return self._skip_target
+        return super().get_next(request)
+
+    def handle(self, request: dict) -> dict:
+        if not TranscriptStore.is_enabled():
+            return super().handle(request)
+
+        key = self.cache_key(request)
+        if key:
+            transcript = TranscriptStore().get(key)
+            request.update({"transcript_cache_key": key, "transcript_cache_hit": transcript is not None})
+            if transcript is not None:
+                print(f"Using cached transcript for {request.get('path')}")
+                request.update({"text": transcript})
+
+        return super().handle(request)
+
+    def cache_key(self, request: dict):
+        path = request.get("path")
+        if request.get("type") == "youtube_url":
+            video_id = youtube_video_id(path)
+            return f"youtube-{video_id}" if video_id else None
+        return f"sha256-{file_sha256(path)}"
@@ -8,14 +8,15 @@ class YouTubeReaderHandler(AbstractHandler):
         url = str(request.get("path"))
         print("Downloading YouTube video from: ", url)
 
-        audio_file_path = self.download_youtube_video_audio(url, os.getenv('DIR_STORAGE'))        
+        audio_file_path, duration = self.download_youtube_video_audio(url, os.getenv('DIR_STORAGE'))        
         
-        request.update({"path": audio_file_path})
+        # The duration lets the transcription handler time its status checks.
+        request.update({"path": audio_file_path, "media_duration_seconds": duration})
         return super().handle(request)
 
     def download_youtube_video_audio(self, url, output_path="downloads"):
         """
-        Downloads the audio from a YouTube video.
+        Downloads the audio from a YouTube video and returns the mp3 file path and its duration in seconds.
         """
         # Ensure output directory exists
         if not os.path.exists(output_path):
@@ -32,9 +33,10 @@ class YouTubeReaderHandler(AbstractHandler):
         new_file = base + '.mp3'
         clip = mp.AudioFileClip(out_file)
         clip.write_audiofile(new_file)
+        duration = clip.duration
         clip.close()
 
         # Remove the original download (mp4)
         os.remove(out_file)
 
-        return new_file
\ No newline at end of file
+        return new_file, duration
\ No newline at end of file
@@ -1,12 +1,16 @@
 import os
-import time
+from boto3.s3.transfer import TransferConfig
 from handlers.abstract_handler import AbstractHandler
 from utils.aws_boto_client_manager import AWSBotoClientManager
+from utils.hashing import file_sha256
+
+# User metadata key holding the SHA-256 of the uploaded file (multipart ETags are not content hashes)
+SHA256_METADATA = 'sha256'
 
 class AmazonS3WriterHandler(AbstractHandler):
-    
+
   def handle(self, request: dict) -> dict:
-    
+
     # Accessing variables from .env file
     BUCKET_NAME = os.getenv('BUCKET_NAME')
     S3_FOLDER = os.getenv('S3_FOLDER')
@@ -14,24 +18,87 @@ class AmazonS3WriterHandler(AbstractHandler):
     # Upload the file to S3
     file_path = request.get("path")
 
+    # The duration lets the transcription handler time its status checks (YouTubeReaderHandler sets it for videos).
+    if request.get("type") == "multimedia_file" and not request.get("media_duration_seconds"):
+        duration = self.media_duration(file_path)
+        if duration:
+            request.update({"media_duration_seconds": duration})
+
     print(f"Writing {file_path} to s3://{BUCKET_NAME}/{S3_FOLDER}")
-    s3_file_path = self.upload_file_to_s3(file_path, BUCKET_NAME, S3_FOLDER)
+    s3_file_path = self.upload_file_to_s3(file_path, BUCKET_NAME, S3_FOLDER, self.known_sha256(request))
 
     s3_path = f"s3://{BUCKET_NAME}/{s3_file_path}"
     request.update({"path": s3_path})
 
     return super().handle(request)
-          
-  def upload_file_to_s3(self, file_path, BUCKET_NAME, S3_FOLDER):
+
+  def upload_file_to_s3(self, file_path, BUCKET_NAME, S3_FOLDER, sha256=None):
       """
-      Uploads a file to an S3 bucket and returns the S3 path.
+      Uploads a file to an S3 bucket and returns the S3 path. The upload is skipped when the object already
+      holds the same content (same SHA-256 in its metadata) unless S3_UPLOAD_DEDUP=false. Large files go up in
+      parallel multipart uploads (S3_UPLOAD_MULTIPART_THRESHOLD, S3_UPLOAD_PART_SIZE, S3_UPLOAD_CONCURRENCY).
       """
       s3_client = AWSBotoClientManager.get_client('s3')
       file_name = file_path.split('/')[-1]
       s3_path = f"{S3_FOLDER}{file_name}"
-      s3_client.upload_file(file_path, BUCKET_NAME, s3_path)
-      
-      # eventual consistency
-      time.sleep(5)
-      
-      return s3_path
\ No newline at end of file
+
+      extra_args = {}
+      if os.getenv('S3_UPLOAD_DEDUP', 'true').lower() in ('true', '1', 't'):
+          sha256 = sha256 or file_sha256(file_path)
+          extra_args['Metadata'] = {SHA256_METADATA: sha256}
+          existing = self.head_object(s3_client, BUCKET_NAME, s3_path)
+          if existing and existing.get('Metadata', {}).get(SHA256_METADATA) == sha256:
+              print(f"s3://{BUCKET_NAME}/{s3_path} is up to date, skipping the upload")
+              return s3_path
+
+      s3_client.upload_file(file_path, BUCKET_NAME, s3_path, ExtraArgs=extra_args, Config=self.transfer_config())
+
+      # S3 is strongly consistent: the object is readable as soon as upload_file returns. The optional check
+      # only guards against a lost upload before a long-running job is started on it.
+      if os.getenv('S3_VERIFY_UPLOAD', 'false').lower() in ('true', '1', 't'):
+          uploaded = self.head_object(s3_client, BUCKET_NAME, s3_path)
+          if uploaded is None or uploaded['ContentLength'] != os.path.getsize(file_path):
+              raise RuntimeError(f"Upload of {file_path} to s3://{BUCKET_NAME}/{s3_path} could not be verified")
+
+      return s3_path
+
+  @staticmethod
+  def transfer_config():
+      return TransferConfig(
+          multipart_threshold=int(os.getenv('S3_UPLOAD_MULTIPART_THRESHOLD', 16 * 1024 * 1024)),
+          multipart_chunksize=int(os.getenv('S3_UPLOAD_PART_SIZE', 16 * 1024 * 1024)),
+          max_concurrency=int(os.getenv('S3_UPLOAD_CONCURRENCY', 10)),
+      )
+
+  @staticmethod
+  def head_object(s3_client, bucket_name, key):
+      """
+      Returns the object's head_object response, or None when it does not exist.
+      """
+      try:
+          return s3_client.head_object(Bucket=bucket_name, Key=key)
+      except s3_client.exceptions.ClientError as e:
+          if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+              return None
+          raise
+
+  @staticmethod
+  def media_duration(file_path):
+      """
+      Returns the duration of an audio or video file in seconds, or None when it cannot be read.
+      """
+      try:
+          import moviepy.editor as mp
+          clip = mp.AudioFileClip(file_path)
+          duration = clip.duration
+          clip.close()
+          return duration
+      except Exception as e:
+          print(f"Could not read the duration of {file_path}: {e}")
+          return None
+
+  @staticmethod
+  def known_sha256(request: dict):
+      # The transcript cache already hashed local media files (see TranscriptCacheReaderHandler.cache_key).
+      key = request.get("transcript_cache_key") or ''
+      return key[len('sha256-'):] if key.startswith('sha256-') else None
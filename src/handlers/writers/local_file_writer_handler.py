@@ -1,11 +1,21 @@
 from handlers.abstract_handler import AbstractHandler
+from utils.text_stream import has_text_stream, iter_text, set_text_stream
 class LocalFileWriterHandler(AbstractHandler):
+
+    supports_text_stream = True
+
     def handle(self, request: dict) -> dict:
         
         file_path = request.get("write_file_path")
 
         print(f"Writing  to {file_path}")
         write_file_path = request.get("write_file_path", None)
+
+        if has_text_stream(request):
+            # Chunks are written as they flow through, the stream continues down the chain.
+            set_text_stream(request, self.write_stream(iter_text(request), write_file_path, request))
+            return super().handle(request)
+
         text = request.get("text", None)
 
         try:
@@ -16,4 +26,21 @@ class LocalFileWriterHandler(AbstractHandler):
         except Exception as e: 
             request.update({"status": False, "error": str(e)})        
 
-        return super().handle(request)
\ No newline at end of file
+        return super().handle(request)
+
+    def write_stream(self, chunks, write_file_path, request):
+        """
+        Appends each chunk to the file and passes it on.
+        """
+        try:
+            f = open(write_file_path, "a")
+        except Exception as e:
+            request.update({"status": False, "error": str(e)})
+            yield from chunks
+            return
+
+        with f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+        request.update({"status": True})
@@ -0,0 +1,17 @@
+from handlers.abstract_handler import AbstractHandler
+from utils.transcript_store import TranscriptStore
+
+class TranscriptCacheWriterHandler(AbstractHandler):
+    """
+    Stores a fresh transcript under the key computed by TranscriptCacheReaderHandler.
+    """
+
+    def handle(self, request: dict) -> dict:
+        key = request.get("transcript_cache_key")
+        text = request.get("text")
+
+        if key and text and not request.get("transcript_cache_hit"):
+            print(f"Caching transcript as {key}")
+            TranscriptStore().put(key, text, source=request.get("path"))
+
+        return super().handle(request)
@@ -6,6 +6,9 @@ import sys
 from typing import Any
 from dotenv import load_dotenv
 from handlers.handler_factory import HandlerFactory
+from handlers.pipeline import Pipeline
+from utils.text_chunker import DEFAULT_SUMMARIZATION_MODE, SUMMARIZATION_MODES, summarization_mode
+from utils.tracing import Tracer
 import argparse
 
 # Load environment variables from .env file
@@ -36,24 +39,45 @@ def determine_input_type(file_path):
         # Assume text
         return "text_or_json"
 
+def check_pipeline_args(pipeline, args):
+    """
+    A pipeline file declares the whole graph, so the flags that shape the default chain cannot be applied to it.
+    Returns an error message for the flags the pipeline would silently ignore, or None.
+    """
+    if args.chat or args.summarize_mode:
+        return "--chat and --summarize-mode do not apply to --pipeline: declare the handlers in the pipeline file instead."
+    handler_names = {type(node.handler).__name__ for node in pipeline.nodes.values() if node.handler is not None}
+    if args.anonymize in (True, 'true', '1') and "AmazonComprehendPIITokenizeHandler" not in handler_names:
+        return ("--anonymize is on (the default) but the pipeline has no AmazonComprehendPIITokenizeHandler node: "
+                "add one (and an AmazonComprehendPIIUntokenizeHandler node after the model calls), or pass --anonymize false.")
+    return None
+
 def construct_chain(input_type, args):
 
     # Use if-elif-else to construct the appropriate chain. In Python 3.10 we could use match statement.
     if input_type == "youtube_url":
+        transcript_cache_reader_handler = HandlerFactory.get_handler("TranscriptCacheReaderHandler")
         youtube_handler = HandlerFactory.get_handler("YouTubeReaderHandler")
         s3writer_handler = HandlerFactory.get_handler("AmazonS3WriterHandler")
         transcription_handler = HandlerFactory.get_handler("AmazonTranscriptionHandler")
+        transcript_cache_writer_handler = HandlerFactory.get_handler("TranscriptCacheWriterHandler")
         local_file_writer_handler = HandlerFactory.get_handler("LocalFileWriterHandler")
         
-        chain = youtube_handler
-        current_handler = youtube_handler.set_next(s3writer_handler).set_next(transcription_handler).set_next(local_file_writer_handler)
+        # A cached transcript skips the download, upload and transcription stages.
+        chain = transcript_cache_reader_handler
+        transcript_cache_reader_handler.set_skip_target(local_file_writer_handler)
+        current_handler = transcript_cache_reader_handler.set_next(youtube_handler).set_next(s3writer_handler).set_next(transcription_handler).set_next(transcript_cache_writer_handler).set_next(local_file_writer_handler)
     elif input_type == "multimedia_file":
+        transcript_cache_reader_handler = HandlerFactory.get_handler("TranscriptCacheReaderHandler")
         s3writer_handler = HandlerFactory.get_handler("AmazonS3WriterHandler")
         transcription_handler = HandlerFactory.get_handler("AmazonTranscriptionHandler")
+        transcript_cache_writer_handler = HandlerFactory.get_handler("TranscriptCacheWriterHandler")
         local_file_writer_handler = HandlerFactory.get_handler("LocalFileWriterHandler")
 
-        chain = s3writer_handler
-        current_handler = s3writer_handler.set_next(transcription_handler).set_next(local_file_writer_handler)
+        # A cached transcript skips the upload and transcription stages.
+        chain = transcript_cache_reader_handler
+        transcript_cache_reader_handler.set_skip_target(local_file_writer_handler)
+        current_handler = transcript_cache_reader_handler.set_next(s3writer_handler).set_next(transcription_handler).set_next(transcript_cache_writer_handler).set_next(local_file_writer_handler)
     elif input_type == "image_file":
         local_file_reader_handler = HandlerFactory.get_handler("LocalFileReaderHandler")
         textract_handler = HandlerFactory.get_handler("AmazonTextractHandler")
@@ -107,9 +131,15 @@ def construct_chain(input_type, args):
         anonymize_handler = HandlerFactory.get_handler("AmazonComprehendPIITokenizeHandler")
         current_handler = current_handler.set_next(anonymize_handler)
 
-    # Add the prompt and bedrock handlers.
-    prompt_handler = HandlerFactory.get_handler("PromptHandler")
-    bedrock_handler = HandlerFactory.get_handler("AmazonBedrockHandler")    
+    # Add the summarization handlers: prompt + bedrock for a single call, or map-reduce / refine for texts larger than the model context.
+    summarize_mode = summarization_mode(getattr(args, 'summarize_mode', None))
+
+    def add_summarization(handler):
+        if summarize_mode == 'single':
+            prompt_handler = HandlerFactory.get_handler("PromptHandler")
+            bedrock_handler = HandlerFactory.get_handler("AmazonBedrockHandler")
+            return handler.set_next(prompt_handler).set_next(bedrock_handler)
+        return handler.set_next(HandlerFactory.get_handler("AmazonBedrockMapReduceHandler"))
         
     # Determinate when / if we need to call summarization or Chat and in what order.
     
@@ -117,16 +147,15 @@ def construct_chain(input_type, args):
         chat_handler = HandlerFactory.get_handler("AmazonBedrockChatHandler")
         print("Enable chat", args)
         if args.chat == 'sum_first':
-            current_handler = current_handler.set_next(prompt_handler)
-            current_handler.set_next(bedrock_handler).set_next(chat_handler)
+            current_handler = add_summarization(current_handler).set_next(chat_handler)
         elif args.chat == 'chat_only': 
             current_handler = current_handler.set_next(chat_handler)
             
         else: 
             current_handler = current_handler.set_next(chat_handler)
-            current_handler = current_handler.set_next(prompt_handler).set_next(bedrock_handler)
+            current_handler = add_summarization(current_handler)
     else: 
-        current_handler = current_handler.set_next(prompt_handler).set_next(bedrock_handler)
+        current_handler = add_summarization(current_handler)
     
     # Finally, if we have tokenized the content, let's untokenize
     if anonymize:
@@ -165,15 +194,27 @@ def main():
     # Optional flag to specify the use of a interactive chat handler
     parser.add_argument("--chat", type=str, default=None, choices=[None, 'sum_first', 'chat_first', 'chat_only'],  help="Choose 'sum_first', 'chat_first' to summarize before chat or direct chat interaction with your original text. Select 'chat_only' if you only want to query your original text")
 
+    # Optional flag to summarize texts larger than the model context in several calls
+    parser.add_argument("--summarize-mode", type=str, default=None, choices=SUMMARIZATION_MODES, help=f"Use 'map_reduce' or 'refine' to summarize texts larger than the model context in several calls. Defaults to SUMMARIZATION_MODE or '{DEFAULT_SUMMARIZATION_MODE}'.")
+
     # Optional flag to turn off anonymization
     parser.add_argument("--anonymize", type=str, default=True, help="Anonymize customer names before sending to the model. By default this is set to true.")
 
+    # Optional flag to bypass the Bedrock response cache
+    parser.add_argument('--no-cache', action='store_true', help='Always call Amazon Bedrock, even if an identical request has been answered before.')
+
+    # Optional flag to run a pipeline graph (parallel branches) declared in a JSON file
+    parser.add_argument('--pipeline', type=str, default=None, help='Path to a JSON pipeline config (see pipelines/) to run instead of the default chain.')
+
     # Optional flag to specify the use of a custom chain
     parser.add_argument('--custom', action='store_true', help='Flag to use a custom processing chain instead of the default based on file type.')
 
     # Parse the command-line arguments
     args = parser.parse_args()
 
+    if args.no_cache:
+        os.environ['AMAZON_BEDROCK_CACHE'] = 'false'
+
     # Handler discovery
     HandlerFactory.discover_handlers()
 
@@ -183,8 +224,14 @@ def main():
     else:
         input_type = determine_input_type(args.file_path)
 
-    # Construct the appropriate processing chain
-    handler_chain = construct_chain(input_type, args)
+    # Construct the appropriate processing chain, or the pipeline graph if one is given
+    if args.pipeline:
+        handler_chain = Pipeline.from_file(args.pipeline)
+        error = check_pipeline_args(handler_chain, args)
+        if error:
+            parser.error(error)
+    else:
+        handler_chain = construct_chain(input_type, args)
 
     # Prepare the output filename with the current date and time
     current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
@@ -196,17 +243,23 @@ def main():
         "path": args.file_path,
         "prompt_file_name": args.prompt_file_name,
         "write_file_path": output_file,
+        "summarize_mode": args.summarize_mode,
         "text": ""        
     }
 
     # Process the request through the chain
-    result = handler_chain.handle(request)
+    result = handler_chain.run(request) if args.pipeline else handler_chain.handle(request)
 
     if result.get("text", None):
         print(result.get("text"))
     else:
         print(result)
 
+    # Where did the time go? (TRACING_ENABLED=true)
+    tracer = Tracer.get_default()
+    if tracer:
+        tracer.write_report(os.getenv('TRACING_REPORT_PATH') or f"./downloads/trace_{current_time}.json")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
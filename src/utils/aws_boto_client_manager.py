@@ -1,16 +1,28 @@
 import os
+import threading
 import boto3
 from botocore.config import Config
+from utils.tracing import Tracer
 
 class AWSBotoClientManager:
     _clients = {}
+    _lock = threading.Lock()
 
     @classmethod
     def get_client(cls, service_name):
      
-        AWS_DEFAULT_REGION = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-        my_config = Config(region_name=AWS_DEFAULT_REGION)
-                
         if service_name not in cls._clients:
-            cls._clients[service_name] = boto3.client(service_name, config=my_config)
+            # boto3 clients are thread-safe, but creating them is not: build each one once, under a lock.
+            with cls._lock:
+                if service_name not in cls._clients:
+                    AWS_DEFAULT_REGION = os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
+                    # Keep enough pooled connections for concurrent fan-out (e.g. parallel Bedrock calls).
+                    max_pool_connections = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', 50))
+                    my_config = Config(region_name=AWS_DEFAULT_REGION, max_pool_connections=max_pool_connections)
+                    client = boto3.client(service_name, config=my_config)
+                    # Time, retries and throttles of every call are recorded when tracing is enabled.
+                    tracer = Tracer.get_default()
+                    if tracer:
+                        tracer.instrument_client(client)
+                    cls._clients[service_name] = client
         return cls._clients[service_name]
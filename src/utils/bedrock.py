@@ -4,64 +4,171 @@
 # Python Built-Ins:
 import json
 import os
+import threading
 from jsonpath_ng import jsonpath, parse
+from jsonpath_ng.jsonpath import Child, Fields, Index, Root, This
 
-# External Dependencies:
-import boto3
+# Local Dependencies:
+from utils.aws_boto_client_manager import AWSBotoClientManager
+from utils.bedrock_cache import BedrockResponseCache
 
-def invoke_model(prompt_text, modelId=os.environ.get("AMAZON_BEDROCK_MODEL_ID", 'anthropic.claude-v2')):
+DEFAULT_MODEL_PROPS = '{"max_tokens_to_sample":4096, "temperature":0.5, "top_k":250, "top_p":0.5, "stop_sequences":[] }'
+
+
+class BedrockModelProfile:
     """
-    Summarizes the given text using Amazon Bedrock, based on a prompt specified by prompt_file_name.
-    """        
+    Everything needed to call one Bedrock model, prepared once: the pooled runtime client, the parsed
+    request body template and the compiled input / output JSONPath expressions. Per call, only the
+    request body needs to be serialized.
 
-    try:
-        # boto3_bedrock = bedrock.get_bedrock_client( assumed_role=os.environ.get("BEDROCK_ASSUME_ROLE", None), region=os.environ.get("AWS_DEFAULT_REGION", None))
-        boto3_bedrock = boto3.client(service_name="bedrock-runtime", region_name=os.environ.get("AWS_DEFAULT_REGION", 'us-east-1'))
+    Profiles are cached by name. The "default" profile is configured with the AMAZON_BEDROCK_* variables,
+    a named profile (e.g. "summary") with AMAZON_BEDROCK_SUMMARY_* variables, falling back to the default ones.
+    """
 
-    except e:
-        print(f"Failed to create Bedrock client: {e}")
-        return
-    
-    body = json.loads(os.environ.get("AMAZON_BEDROCK_MODEL_PROPS", {"max_tokens_to_sample":4096, "temperature":0.5, "top_k":250, "top_p":0.5, "stop_sequences":[] }))
-    prompt_template = os.environ.get("AMAZON_BEDROCK_PROMPT_TEMPLATE", None)
-    prompt_var = os.environ.get("AMAZON_BEDROCK_PROMPT_INPUT_VAR", "prompt")
-    output_json_path = os.environ.get("AMAZON_BEDROCK_OUTPUT_JSONPATH", "$")
-    
-    # Format the prompt.
-    prompt_template = prompt_template.format(prompt_text=prompt_text) 
-
-    # JSONPath expression
-    jsonpath_expr = parse(prompt_var)
-    # Find the path and set the new content
-    for match in jsonpath_expr.find(body):
-        # Check if the matched element is not at the root level
-        if hasattr(match.full_path, 'left'):
-            parent_path = match.full_path.left
-            jsonpath_expr_update = parse(str(parent_path))
-            for match_update in jsonpath_expr_update.find(body):
-                match_update.value['content'] = prompt_template
-        else: 
-            # Directly modify the root element's value
-            body[ str(match.full_path) ] = prompt_template
-    
-    body = json.dumps(body)
-    try:
-        accept = 'application/json'
-        contentType = 'application/json'
-        
-        response = boto3_bedrock.invoke_model(body=body, modelId=modelId, accept=accept, contentType=contentType)
-        response_body = json.loads(response.get('body').read())
+    _profiles = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model_id, model_props, prompt_template="{prompt_text}", prompt_input_var="prompt", output_json_path="$"):
+        self.model_id = model_id
+        self.client = AWSBotoClientManager.get_client('bedrock-runtime')
+        self.body_template = json.loads(model_props) if isinstance(model_props, str) else model_props
+        self.prompt_template = prompt_template or "{prompt_text}"
+        self.output_json_path = output_json_path
+        self.output_expr = parse(output_json_path)
+        self.input_keys = self._compile_input_path(parse(prompt_input_var))
+
+    @classmethod
+    def get(cls, name="default", model_id=None):
+        """
+        Returns the profile with the given name, building it on first use. When a model_id is given,
+        the profile is specific to that model and the name only selects the configuration.
+        """
+        key = (name, model_id)
+        profile = cls._profiles.get(key)
+        if profile is None:
+            with cls._lock:
+                profile = cls._profiles.get(key)
+                if profile is None:
+                    profile = cls._profiles[key] = cls.from_env(name, model_id)
+        return profile
+
+    @classmethod
+    def register(cls, name, **settings):
+        """
+        Registers a profile built from explicit settings (see __init__) instead of environment variables.
+        """
+        profile = cls(**settings)
+        with cls._lock:
+            cls._profiles[(name, None)] = profile
+        return profile
+
+    @classmethod
+    def from_env(cls, name="default", model_id=None):
+        def setting(key, default=None):
+            if name != "default":
+                value = os.environ.get(f"AMAZON_BEDROCK_{name.upper()}_{key}")
+                if value is not None:
+                    return value
+            return os.environ.get(f"AMAZON_BEDROCK_{key}", default)
+
+        return cls(
+            model_id=model_id or setting("MODEL_ID", 'anthropic.claude-v2'),
+            model_props=setting("MODEL_PROPS", DEFAULT_MODEL_PROPS),
+            prompt_template=setting("PROMPT_TEMPLATE", "{prompt_text}"),
+            prompt_input_var=setting("PROMPT_INPUT_VAR", "prompt"),
+            output_json_path=setting("OUTPUT_JSONPATH", "$"),
+        )
+
+    def build_body(self, prompt_text):
+        """
+        Renders the prompt into a copy of the body template and serializes it. Only the containers on the
+        path to the prompt are copied, the rest of the template is shared.
+        """
+        prompt = self.prompt_template.format(prompt_text=prompt_text)
+        body = dict(self.body_template)
+        node = body
+        for key in self.input_keys[:-1]:
+            child = node[key]
+            node[key] = child = list(child) if isinstance(child, list) else dict(child)
+            node = child
+        node[self.input_keys[-1]] = prompt
+        return json.dumps(body)
+
+    def invoke(self, prompt_text, use_cache=True):
+        """
+        Invokes the model with the given prompt and returns the value at the output JSONPath
+        (or the whole response body if the path does not match). Identical requests are served
+        from the response cache unless use_cache is False.
+        """
+        body = self.build_body(prompt_text)
+
+        cache = BedrockResponseCache.get_default() if use_cache else None
+        if cache is not None:
+            cached = cache.get(self.model_id, body)
+            if cached is not None:
+                return self.extract_output(json.loads(cached))
+
+        response = self.client.invoke_model(body=body, modelId=self.model_id, accept='application/json', contentType='application/json')
+        response_body = response.get('body').read().decode('utf-8')
 
+        if cache is not None:
+            cache.put(self.model_id, body, response_body)
+
+        return self.extract_output(json.loads(response_body))
+
+    def extract_output(self, response_body):
         # Trying to fetch data from the response body based on pre-configured JSONPath expression
-        jsonpath_expression = parse(output_json_path)        
-        try: 
-            result = jsonpath_expression.find(response_body)
-        
-            if result[0].value: 
+        try:
+            result = self.output_expr.find(response_body)
+            if result[0].value:
                 return result[0].value
-        except: 
-            print(f"Failed to apply JSONPAth: {output_json_path}, returning the whole body")
+        except Exception:
+            print(f"Failed to apply JSONPAth: {self.output_json_path}, returning the whole body")
             return response_body
-        
+
+    def _compile_input_path(self, expr):
+        """
+        Resolves the prompt input JSONPath against the body template once, into a list of keys / indexes.
+        Like the original implementation, when the path points inside an object the prompt goes into
+        that object's 'content' field.
+        """
+        matches = expr.find(self.body_template)
+        if not matches:
+            raise ValueError(f"Prompt input path {expr} does not match the model body template.")
+
+        keys = self._path_keys(matches[0].full_path)
+        if len(keys) > 1:
+            keys[-1] = 'content'
+        return keys
+
+    def _path_keys(self, path):
+        if isinstance(path, (Root, This)):
+            return []
+        if isinstance(path, Child):
+            return self._path_keys(path.left) + self._path_keys(path.right)
+        if isinstance(path, Fields) and len(path.fields) == 1:
+            return [path.fields[0]]
+        if isinstance(path, Index):
+            # jsonpath_ng < 1.7 exposes a single `index`, newer versions a tuple of `indices`.
+            indices = getattr(path, 'indices', None) or (path.index,)
+            if len(indices) == 1:
+                return [indices[0]]
+        raise ValueError(f"Unsupported prompt input path: {path}")
+
+
+def invoke_model(prompt_text, modelId=None, profile="default", use_cache=True):
+    """
+    Summarizes the given text using Amazon Bedrock, based on a prompt specified by prompt_file_name.
+    Set use_cache=False (or AMAZON_BEDROCK_CACHE=false) to bypass the response cache.
+    """
+
+    try:
+        model_profile = BedrockModelProfile.get(profile, modelId)
+    except Exception as e:
+        print(f"Failed to create Bedrock client: {e}")
+        return
+
+    try:
+        return model_profile.invoke(prompt_text, use_cache=use_cache)
     except Exception as e:
         print(f"Failed to invoke model: {e}")
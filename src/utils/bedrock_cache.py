@@ -0,0 +1,130 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class BedrockResponseCache:
+    """
+    Persistent, content-addressed cache of Bedrock responses. Entries are keyed on a hash of the model id
+    and the fully rendered request body, stored in SQLite under DIR_STORAGE, and evicted by age (TTL) and
+    total size (least recently used first).
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    # Puts between two full passes over the table (TTL sweep and size resync with other processes)
+    SWEEP_INTERVAL = 256
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024, ttl_seconds=30 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model_id TEXT, body TEXT, size INTEGER, created_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        # Running total of the stored response sizes (UTF-8 bytes), so a put does not have to sum the table.
+        self._total_bytes = self._stored_bytes()
+        self._puts_since_sweep = 0
+
+    @classmethod
+    def get_default(cls):
+        """
+        Returns the process-wide cache configured from the environment, or None when caching is turned off
+        with AMAZON_BEDROCK_CACHE=false.
+        """
+        if os.getenv('AMAZON_BEDROCK_CACHE', 'true').lower() not in ('true', '1', 't'):
+            return None
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls(
+                        os.path.join(os.getenv('DIR_STORAGE', './'), 'bedrock_cache.sqlite'),
+                        max_bytes=int(os.getenv('AMAZON_BEDROCK_CACHE_MAX_MB', 512)) * 1024 * 1024,
+                        ttl_seconds=int(os.getenv('AMAZON_BEDROCK_CACHE_TTL_SECONDS', 30 * 24 * 3600)),
+                    )
+        return cls._default
+
+    @staticmethod
+    def make_key(model_id, body):
+        return hashlib.sha256(f"{model_id}\n{body}".encode('utf-8')).hexdigest()
+
+    def get(self, model_id, body):
+        """
+        Returns the cached response body (as a string) for the model and request body, or None.
+        """
+        key = self.make_key(model_id, body)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT body, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, model_id, body, response_body):
+        key = self.make_key(model_id, body)
+        size = len(response_body.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            replaced = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model_id, body, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_id, response_body, size, now, now),
+            )
+            self._total_bytes += size - (replaced[0] if replaced else 0)
+            self.writes += 1
+            self._puts_since_sweep += 1
+            if self._total_bytes > self.max_bytes or self._puts_since_sweep >= self.SWEEP_INTERVAL:
+                self._evict(now)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes, "evictions": self.evictions, "entries": entries, "bytes": size}
+
+    def _stored_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self, now):
+        """
+        Drops expired entries, then the least recently used ones until the cache fits in max_bytes. Runs every
+        SWEEP_INTERVAL puts, or when the running total goes over the limit; expired entries are never returned
+        by get() in between. The total is recomputed here because other processes may share the database.
+        """
+        self._puts_since_sweep = 0
+        expired = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        self.evictions += max(expired, 0)
+
+        total = self._stored_bytes()
+        while total > self.max_bytes:
+            victims = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at LIMIT 256").fetchall()
+            if not victims:
+                break
+            for key, size in victims:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.evictions += 1
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._total_bytes = total
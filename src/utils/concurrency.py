@@ -0,0 +1,16 @@
+from collections import deque
+
+
+def bounded_ordered_map(executor, fn, items, window):
+    """
+    Like executor.map(fn, items), but pulls items lazily and keeps at most `window` calls in flight,
+    so a long (or endless) iterable of large items never sits in memory all at once.
+    Results are yielded in the order of the items.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
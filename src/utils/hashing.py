@@ -0,0 +1,11 @@
+import hashlib
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """
+    Returns the SHA-256 hex digest of a file, reading it in chunks so large media files are never fully loaded in memory.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,178 @@
+import codecs
+import hashlib
+import json
+import os
+import re
+import threading
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+class HTTPFetchError(Exception):
+    pass
+
+
+class FetchResult:
+
+    def __init__(self, url, status, body, headers, from_cache=False):
+        self.url = url
+        self.status = status  # 304 when the cached copy was revalidated
+        self.body = body
+        self.headers = headers
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.body.decode(detect_charset(self.body, self.headers.get('Content-Type')), errors='replace')
+
+
+def detect_charset(body, content_type=None):
+    """
+    The charset of an HTML response: from the Content-Type header, a byte order mark or a <meta> tag
+    in the first 4 KB, then UTF-8 if the body is valid UTF-8, and Windows-1252 (the HTML default) otherwise.
+    """
+    if content_type:
+        match = re.search(r'charset\s*=\s*["\']?([\w.:-]+)', content_type, re.IGNORECASE)
+        if match and _is_known_codec(match.group(1)):
+            return match.group(1)
+    for bom, charset in BOMS:
+        if body.startswith(bom):
+            return charset
+    match = META_CHARSET.search(body[:4096])
+    if match and _is_known_codec(match.group(1).decode('ascii', 'ignore')):
+        return match.group(1).decode('ascii')
+    try:
+        body.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def _is_known_codec(name):
+    try:
+        codecs.lookup(name)
+        return True
+    except LookupError:
+        return False
+
+
+class HTTPFetcher:
+    """
+    Shared HTTP client for the readers: keep-alive connections pooled per host (at most
+    HTTP_MAX_CONNECTIONS_PER_HOST requests in flight to one host), compressed transfer, timeouts,
+    retries with backoff, and an on-disk cache under DIR_STORAGE/http_cache that is revalidated
+    with If-None-Match / If-Modified-Since, so unchanged pages come back as a 304 without a body.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, timeout=30.0, max_connections_per_host=8, max_concurrency=32, cache_dir=None):
+        self.max_concurrency = max_concurrency
+        self.cache_dir = cache_dir
+        self.pool = urllib3.PoolManager(
+            num_pools=64,
+            maxsize=max_connections_per_host,
+            block=True,  # Wait for a free connection instead of opening more than maxsize to a host
+            timeout=urllib3.Timeout(connect=min(timeout, 10.0), read=timeout),
+            retries=urllib3.Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504), respect_retry_after_header=True),
+            headers=urllib3.util.make_headers(keep_alive=True, accept_encoding=True, user_agent="Mozilla/5.0 (compatible; summarization-tool)"),
+        )
+
+    @classmethod
+    def get_default(cls):
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    use_cache = os.getenv('HTTP_CACHE', 'true').lower() in ('true', '1', 't')
+                    cls._default = cls(
+                        timeout=float(os.getenv('HTTP_TIMEOUT', 30)),
+                        max_connections_per_host=int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', 8)),
+                        max_concurrency=int(os.getenv('HTTP_MAX_CONCURRENCY', 32)),
+                        cache_dir=os.path.join(os.getenv('DIR_STORAGE', './'), 'http_cache') if use_cache else None,
+                    )
+        return cls._default
+
+    def fetch(self, url, headers=None):
+        """
+        GETs the URL and returns a FetchResult. Raises HTTPFetchError on an error status.
+        """
+        request_headers = dict(headers or {})
+        cached = self._cache_get(url)
+        if cached:
+            metadata, body = cached
+            if metadata.get('etag'):
+                request_headers['If-None-Match'] = metadata['etag']
+            if metadata.get('last_modified'):
+                request_headers['If-Modified-Since'] = metadata['last_modified']
+
+        response = self.pool.request('GET', url, headers=request_headers, decode_content=True)
+
+        if response.status == 304:
+            if cached:
+                return FetchResult(url, 304, body, metadata.get('headers', {}), from_cache=True)
+            # Not modified, but there is no cached copy to return (conditional headers from the caller,
+            # or a cache entry removed meanwhile): ask for the full page.
+            unconditional = {key: value for key, value in request_headers.items() if key.lower() not in ('if-none-match', 'if-modified-since')}
+            response = self.pool.request('GET', url, headers=unconditional, decode_content=True)
+        if response.status >= 400:
+            raise HTTPFetchError(f"HTTP {response.status} fetching {url}")
+
+        result = FetchResult(url, response.status, response.data, {key: value for key, value in response.headers.items()})
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        if 'no-store' not in cache_control and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            self._cache_put(url, response.headers, response.data)
+        return result
+
+    def fetch_many(self, urls, headers=None):
+        """
+        Fetches the URLs concurrently (HTTP_MAX_CONCURRENCY in total, the connection pools bound the requests
+        per host) and returns the results in the order of the URLs; a failed fetch returns its exception.
+        """
+        def fetch_one(url):
+            try:
+                return self.fetch(url, headers)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="http") as executor:
+            return list(executor.map(fetch_one, urls))
+
+    def _cache_paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def _cache_get(self, url):
+        if not self.cache_dir:
+            return None
+        metadata_path, body_path = self._cache_paths(url)
+        try:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            with open(body_path, 'rb') as f:
+                return metadata, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def _cache_put(self, url, response_headers, body):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        metadata_path, body_path = self._cache_paths(url)
+        metadata = {
+            "url": url,
+            "etag": response_headers.get('ETag'),
+            "last_modified": response_headers.get('Last-Modified'),
+            "headers": {"Content-Type": response_headers.get('Content-Type', '')},
+        }
+        # The body goes first, so the metadata never points to a partial body.
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(body_path + suffix, 'wb') as f:
+            f.write(body)
+        os.replace(body_path + suffix, body_path)
+        with open(metadata_path + suffix, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f)
+        os.replace(metadata_path + suffix, metadata_path)
@@ -0,0 +1,48 @@
+import os
+import threading
+
+
+class PDFPageCache:
+    """
+    On-disk cache of extracted PDF page texts, one small file per page under DIR_STORAGE/pdf_cache.
+    Keys are content hashes (see PDFReaderHandler.page_keys), so entries never go stale: a changed page
+    simply gets a new key.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    @classmethod
+    def get_default(cls):
+        """
+        Returns the process-wide cache, or None when it is turned off with PDF_PAGE_CACHE=false.
+        """
+        if os.getenv('PDF_PAGE_CACHE', 'true').lower() not in ('true', '1', 't'):
+            return None
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls(os.path.join(os.getenv('DIR_STORAGE', './'), 'pdf_cache'))
+        return cls._default
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, text):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial page.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
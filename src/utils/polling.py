@@ -0,0 +1,17 @@
+import random
+
+
+def poll_delays(expected_seconds=None, min_delay=2.0, max_delay=60.0, backoff=2.0, jitter=True):
+    """
+    Yields the time to wait before each status check of a long running job. When the expected
+    duration is known, the first check happens shortly before the job should be done; after that
+    the delay starts at min_delay and grows exponentially up to max_delay. With jitter, each delay
+    is drawn from [delay / 2, delay] so that concurrent jobs don't poll in lockstep.
+    """
+    if expected_seconds:
+        yield max(min_delay, expected_seconds * 0.8)
+
+    delay = min_delay
+    while True:
+        yield random.uniform(delay / 2, delay) if jitter else delay
+        delay = min(delay * backoff, max_delay)
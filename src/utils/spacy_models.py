@@ -0,0 +1,25 @@
+import os
+import threading
+
+# Pipeline components that named entity recognition does not need.
+DEFAULT_EXCLUDE = "tagger,parser,attribute_ruler,lemmatizer,senter"
+
+_models = {}
+_lock = threading.Lock()
+
+
+def get_nlp(model_name="en_core_web_sm"):
+    """
+    Returns the spaCy pipeline for the model, loading it once per process with the unused
+    components (SPACY_EXCLUDE) left out.
+    """
+    nlp = _models.get(model_name)
+    if nlp is None:
+        with _lock:
+            nlp = _models.get(model_name)
+            if nlp is None:
+                # Imported here, spaCy is slow to import and only needed by the anonymization handler.
+                import spacy
+                exclude = [name.strip() for name in os.getenv('SPACY_EXCLUDE', DEFAULT_EXCLUDE).split(',') if name.strip()]
+                nlp = _models[model_name] = spacy.load(model_name, exclude=exclude)
+    return nlp
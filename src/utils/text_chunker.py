@@ -0,0 +1,61 @@
+"""Helpers to split long texts into chunks at natural boundaries"""
+import os
+
+# Boundaries we prefer to split on, from the strongest to the weakest.
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+# How texts are summarized: in one call, or split into chunks for texts larger than the model context.
+SUMMARIZATION_MODES = ('single', 'map_reduce', 'refine')
+DEFAULT_SUMMARIZATION_MODE = 'single'
+
+
+def summarization_mode(requested=None):
+    """
+    Returns the summarization mode: the requested one, else SUMMARIZATION_MODE, else DEFAULT_SUMMARIZATION_MODE.
+    """
+    return requested or os.getenv('SUMMARIZATION_MODE') or DEFAULT_SUMMARIZATION_MODE
+
+
+def split_text_spans(text, max_size, overlap=0, size=len):
+    """
+    Splits the text into (start, end) spans of at most `max_size`, as measured by `size`
+    (e.g. characters, or UTF-8 bytes with `size=utf8_size`). Spans end on paragraph, line,
+    sentence or word boundaries when possible, and consecutive spans overlap by up to
+    `overlap` characters.
+    """
+    spans = []
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(start + max_size, length)
+        # Shrink the window until it fits, for size functions that are not plain character counts.
+        while end > start + 1 and size(text[start:end]) > max_size:
+            end = start + max(1, (end - start) * max_size // size(text[start:end]))
+        if end < length:
+            end = _find_boundary(text, start, end)
+        spans.append((start, end))
+        if end >= length:
+            break
+        start = max(end - overlap, start + 1) if overlap else end
+    return spans
+
+
+def split_text(text, max_size, overlap=0, size=len):
+    """
+    Splits the text into chunks of at most `max_size`, see split_text_spans().
+    """
+    return [text[start:end] for start, end in split_text_spans(text, max_size, overlap, size)]
+
+
+def utf8_size(text):
+    return len(text.encode('utf-8'))
+
+
+def _find_boundary(text, start, end):
+    # Don't accept boundaries in the first half of the window, that would produce tiny chunks.
+    lower = start + (end - start) // 2
+    for separator in SEPARATORS:
+        index = text.rfind(separator, lower, end)
+        if index != -1:
+            return index + len(separator)
+    return end
@@ -0,0 +1,67 @@
+"""
+Optional streaming text protocol for the handler chain.
+
+A handler that produces text incrementally stores an iterator of text chunks in request["text_stream"]
+instead of one string in request["text"]. Handlers that can consume it set `supports_text_stream = True`
+and read it with iter_text(); for every other handler the chain materializes the stream into
+request["text"] first (see materialize()), so string-based handlers keep working unchanged.
+"""
+import os
+from utils.text_chunker import split_text_spans
+
+TEXT_STREAM = "text_stream"
+
+
+def is_streaming_enabled():
+    return os.getenv('TEXT_STREAMING', 'false').lower() in ('true', '1', 't')
+
+
+def stream_chunk_size():
+    return int(os.getenv('TEXT_STREAM_CHUNK_SIZE', 1024 * 1024))
+
+
+def set_text_stream(request, chunks):
+    request[TEXT_STREAM] = iter(chunks)
+    request["text"] = ""
+    return request
+
+
+def has_text_stream(request):
+    return request is not None and request.get(TEXT_STREAM) is not None
+
+
+def materialize(request):
+    """
+    Joins a pending text stream into request["text"].
+    """
+    if has_text_stream(request):
+        request["text"] = "".join(request.pop(TEXT_STREAM))
+    return request
+
+
+def iter_text(request, chunk_size=None):
+    """
+    Returns the request text as an iterator of chunks, consuming the text stream if there is one.
+    """
+    if has_text_stream(request):
+        return request.pop(TEXT_STREAM)
+    text = request.get("text") or ""
+    chunk_size = chunk_size or stream_chunk_size()
+    return (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+
+
+def rechunk(chunks, max_size, size=len):
+    """
+    Regroups a stream of text chunks into chunks of at most `max_size` that end on paragraph,
+    line, sentence or word boundaries (see split_text_spans). Only one chunk is buffered at a time.
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        spans = split_text_spans(buffer, max_size, size=size)
+        # The last span may still grow with the next chunk, keep it in the buffer.
+        for start, end in spans[:-1]:
+            yield buffer[start:end]
+        buffer = buffer[spans[-1][0]:] if spans else ""
+    if buffer:
+        yield buffer
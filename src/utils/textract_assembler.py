@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+
+class TextractTextAssembler:
+    """
+    Assembles the text of a multi-page Textract result one result page at a time. LINE blocks are
+    written to a spooled buffer (in memory, moving to a temporary file past TEXTRACT_SPOOL_MAX_MB)
+    and the blocks are released as soon as they have been consumed, so memory stays flat and time
+    stays linear in the number of pages. The character offset at which each document page starts
+    is recorded along the way.
+    """
+
+    def __init__(self, spool_max_size=None):
+        if spool_max_size is None:
+            spool_max_size = int(os.getenv('TEXTRACT_SPOOL_MAX_MB', 64)) * 1024 * 1024
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=spool_max_size, mode='w+', encoding='utf-8')
+        self._length = 0
+        self._current_page = None
+        self.page_offsets = []
+
+    def add_blocks(self, blocks):
+        for block in blocks:
+            if block['BlockType'] != 'LINE':
+                continue
+            page = block.get('Page', 1)
+            if page != self._current_page:
+                self._current_page = page
+                self.page_offsets.append({"page": page, "offset": self._length})
+            line = block['Text'] + '\n'
+            self._buffer.write(line)
+            self._length += len(line)
+
+    def add_response_pages(self, first_response, fetch_next):
+        """
+        Consumes the first result page and keeps calling fetch_next(next_token) while Textract returns a NextToken.
+        """
+        response = first_response
+        while True:
+            self.add_blocks(response.get('Blocks', []))
+            next_token = response.get('NextToken', None)
+            if not next_token:
+                break
+            response = fetch_next(next_token)
+
+    def get_text(self):
+        self._buffer.seek(0)
+        text = self._buffer.read()
+        self._buffer.close()
+        return text
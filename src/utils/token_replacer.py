@@ -0,0 +1,57 @@
+import re
+
+# The run of word characters at the end of a text.
+TRAILING_WORD = re.compile(r'\w*\Z')
+
+
+class TokenReplacer:
+    """
+    Restores the original values of tokens (e.g. T1, T2, ... T10 from PII tokenization) in a single
+    pass. The token map is compiled once into one alternation regex: longest tokens first, and
+    only whole words match, so replacing T1 never touches T10.
+    """
+
+    def __init__(self, token_map):
+        self.token_map = token_map
+        tokens = sorted(token_map, key=len, reverse=True)
+        self.max_token_length = len(tokens[0]) if tokens else 0
+        self.pattern = re.compile(r'(?<!\w)(?:' + '|'.join(map(re.escape, tokens)) + r')(?!\w)') if tokens else None
+
+    def replace(self, text):
+        if not self.pattern or not text:
+            return text
+        return self.pattern.sub(lambda match: self.token_map[match.group(0)], text)
+
+    def stream(self, chunks):
+        """
+        Replaces tokens in a stream of text chunks (e.g. a streaming model response) and yields the
+        restored text. A trailing word that could still grow into a token is held back until the
+        next chunk shows where it ends.
+        """
+        context = ''  # Last character already emitted, so word boundaries work across chunks
+        pending = ''
+        for chunk in chunks:
+            buffer = pending + chunk
+            cut = TRAILING_WORD.search(buffer).start()
+            if len(buffer) - cut > self.max_token_length:
+                cut = len(buffer)  # Too long to be a token, whatever comes next
+            pending = buffer[cut:]
+            if cut:
+                yield self._replace_after(context, buffer[:cut])
+                context = buffer[cut - 1]
+        if pending:
+            yield self._replace_after(context, pending)
+
+    def _replace_after(self, context, text):
+        if not self.pattern:
+            return text
+        text = context + text
+        parts = []
+        position = len(context)
+        # Matching from `position` still lets the look-behind see the context character.
+        for match in self.pattern.finditer(text, position):
+            parts.append(text[position:match.start()])
+            parts.append(self.token_map[match.group(0)])
+            position = match.end()
+        parts.append(text[position:])
+        return ''.join(parts)
@@ -0,0 +1,381 @@
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Error codes AWS services use for throttling
+THROTTLE_ERROR_CODES = {
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException",
+    "TooManyRequestsException", "ProvisionedThroughputExceededException", "RequestLimitExceeded",
+    "SlowDown", "LimitExceededException",
+}
+
+# The handler span AWS calls made in the current context are attributed to
+current_span: ContextVar["Span"] = ContextVar("current_span", default=None)
+
+
+def is_tracing_enabled():
+    return os.getenv('TRACING_ENABLED', 'false').lower() in ('true', '1', 't')
+
+
+def text_size(request):
+    """
+    Size in bytes (utf-8) of request["text"]; non-string results (e.g. insights) are measured as JSON.
+    """
+    text = request.get("text") if isinstance(request, dict) else None
+    if not text:
+        return 0
+    if not isinstance(text, str):
+        text = json.dumps(text, default=str)
+    return len(text.encode('utf-8'))
+
+
+class Span:
+
+    def __init__(self, name, handler, parent=None):
+        self.name = name
+        self.handler = handler
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent = parent
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.bytes_in = 0
+        self.bytes_out = None
+        self.child_seconds = 0.0  # Time spent in handlers further down the chain
+        self.aws_seconds = 0.0
+        self.aws_calls = 0
+        self.retries = 0
+        self.throttles = 0
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def duration_seconds(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    @property
+    def self_seconds(self):
+        return max(self.duration_seconds - self.child_seconds, 0.0)
+
+    def to_otel(self):
+        """
+        The span in the OpenTelemetry (OTLP JSON) span layout.
+        """
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": {
+                "handler.self_seconds": round(self.self_seconds, 6),
+                "handler.bytes_in": self.bytes_in,
+                "handler.bytes_out": self.bytes_out or 0,
+                "aws.seconds": round(self.aws_seconds, 6),
+                "aws.calls": self.aws_calls,
+                "aws.retries": self.retries,
+                "aws.throttles": self.throttles,
+            },
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error else {"code": "STATUS_CODE_OK"},
+        }
+
+
+class Tracer:
+    """
+    Records one span per handler invocation (wall time, time in AWS calls, bytes of request["text"]
+    in and out, retries and throttles) and aggregates them per handler and per AWS operation.
+    Spans are exported in the OpenTelemetry JSON layout, as a JSON run report (write_report) or as
+    Prometheus metrics (prometheus_text / start_metrics_server).
+
+    Handlers are instrumented by AbstractHandler; AWS calls by AWSBotoClientManager through botocore
+    event hooks. AWS calls are attributed to the handler running in the current context: calls made
+    from worker threads of a plain ThreadPoolExecutor are counted per operation but not per handler.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, max_spans=10000):
+        self.spans = deque(maxlen=max_spans)
+        self.handlers = {}
+        self.aws_operations = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_default(cls):
+        """
+        Returns the process-wide tracer, or None when tracing is turned off (TRACING_ENABLED=false).
+        """
+        if not is_tracing_enabled():
+            return None
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls(max_spans=int(os.getenv('TRACING_MAX_SPANS', 10000)))
+                    port = os.getenv('TRACING_PROMETHEUS_PORT')
+                    if port:
+                        cls._default.start_metrics_server(int(port), os.getenv('TRACING_PROMETHEUS_HOST') or '127.0.0.1')
+        return cls._default
+
+    # Handler spans
+
+    def start_span(self, handler, request):
+        span = Span(type(handler).__name__, handler, parent=current_span.get())
+        span.bytes_in = text_size(request)
+        return span
+
+    def end_span(self, span, request, error=None):
+        span.end_ns = time.time_ns()
+        if span.bytes_out is None:
+            span.bytes_out = text_size(request)
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        if span.parent:
+            span.parent.child_seconds += span.duration_seconds
+
+        with self._lock:
+            self.spans.append(span)
+            stats = self.handlers.setdefault(span.name, {
+                "invocations": 0, "errors": 0, "wall_seconds": 0.0, "self_seconds": 0.0, "aws_seconds": 0.0,
+                "aws_calls": 0, "retries": 0, "throttles": 0, "bytes_in": 0, "bytes_out": 0,
+            })
+            stats["invocations"] += 1
+            stats["errors"] += 1 if error is not None else 0
+            stats["wall_seconds"] += span.duration_seconds
+            stats["self_seconds"] += span.self_seconds
+            stats["aws_seconds"] += span.aws_seconds
+            stats["aws_calls"] += span.aws_calls
+            stats["retries"] += span.retries
+            stats["throttles"] += span.throttles
+            stats["bytes_in"] += span.bytes_in
+            stats["bytes_out"] += span.bytes_out
+
+    @staticmethod
+    def record_output(request):
+        """
+        Called when a handler hands the request on: the text size at that point is the handler's output,
+        even if the span keeps running while the rest of the chain is processed.
+        """
+        span = current_span.get()
+        if span is not None and span.bytes_out is None:
+            span.bytes_out = text_size(request)
+
+    # AWS calls (botocore event hooks)
+
+    def instrument_client(self, client):
+        # Registering on the event prefix catches the events of every operation of the client.
+        events = client.meta.events
+        events.register('before-call', self._before_aws_call)
+        events.register('after-call', self._after_aws_call)
+        events.register('after-call-error', self._after_aws_call_error)
+        events.register('needs-retry', self._on_needs_retry)
+
+    def _before_aws_call(self, context, **kwargs):
+        context["tracing_started"] = time.perf_counter()
+
+    def _after_aws_call(self, context, event_name, parsed=None, **kwargs):
+        metadata = (parsed or {}).get("ResponseMetadata", {})
+        error_code = (parsed or {}).get("Error", {}).get("Code")
+        self._record_aws_call(event_name, context, metadata.get("RetryAttempts", 0), error_code)
+
+    def _after_aws_call_error(self, context, event_name, exception=None, **kwargs):
+        self._record_aws_call(event_name, context, 0, type(exception).__name__)
+
+    def _on_needs_retry(self, event_name, response=None, **kwargs):
+        error_code = (response[1] or {}).get("Error", {}).get("Code") if response else None
+        if error_code in THROTTLE_ERROR_CODES:
+            span = current_span.get()
+            if span is not None:
+                with span._lock:
+                    span.throttles += 1
+            with self._lock:
+                self._operation_stats(event_name)["throttles"] += 1
+        return None  # Let botocore's own retry handler decide
+
+    def _record_aws_call(self, event_name, context, retries, error_code):
+        started = context.pop("tracing_started", None)
+        elapsed = time.perf_counter() - started if started is not None else 0.0
+
+        span = current_span.get()
+        if span is not None:
+            with span._lock:
+                span.aws_seconds += elapsed
+                span.aws_calls += 1
+                span.retries += retries
+
+        with self._lock:
+            stats = self._operation_stats(event_name)
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+            stats["retries"] += retries
+            stats["errors"] += 1 if error_code else 0
+
+    def _operation_stats(self, event_name):
+        # Event names look like "after-call.bedrock-runtime.InvokeModel"
+        _, service, operation = event_name.split('.', 2)
+        return self.aws_operations.setdefault(f"{service}.{operation}", {
+            "service": service, "operation": operation, "calls": 0, "seconds": 0.0, "retries": 0, "throttles": 0, "errors": 0,
+        })
+
+    # Exports
+
+    def export_spans(self):
+        with self._lock:
+            return [span.to_otel() for span in self.spans]
+
+    def report(self):
+        """
+        The JSON run report: totals per handler (slowest first), per AWS operation and the recorded spans.
+        """
+        with self._lock:
+            handlers = {name: {key: round(value, 6) if isinstance(value, float) else value for key, value in stats.items()}
+                        for name, stats in sorted(self.handlers.items(), key=lambda item: -item[1]["self_seconds"])}
+            aws_operations = {name: {key: round(value, 6) if isinstance(value, float) else value for key, value in stats.items()}
+                              for name, stats in sorted(self.aws_operations.items(), key=lambda item: -item[1]["seconds"])}
+        return {
+            "started_at": self.started_at,
+            "elapsed_seconds": round(time.time() - self.started_at, 3),
+            "handlers": handlers,
+            "aws_operations": aws_operations,
+            "spans": self.export_spans(),
+        }
+
+    def write_report(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Trace report written to {file_path}")
+        return file_path
+
+    def prometheus_text(self):
+        """
+        The aggregated metrics in the Prometheus text exposition format.
+        """
+        handler_metrics = [
+            ("handler_invocations_total", "counter", "invocations", "Handler invocations."),
+            ("handler_errors_total", "counter", "errors", "Handler invocations that raised."),
+            ("handler_wall_seconds_total", "counter", "wall_seconds", "Wall time of handler invocations, including the rest of the chain."),
+            ("handler_self_seconds_total", "counter", "self_seconds", "Wall time spent in the handler itself."),
+            ("handler_aws_seconds_total", "counter", "aws_seconds", "Time spent in AWS calls made by the handler."),
+            ("handler_bytes_in_total", "counter", "bytes_in", "Bytes of request text received by the handler."),
+            ("handler_bytes_out_total", "counter", "bytes_out", "Bytes of request text produced by the handler."),
+            ("handler_aws_retries_total", "counter", "retries", "Retried AWS call attempts made by the handler."),
+            ("handler_aws_throttles_total", "counter", "throttles", "Throttled AWS call attempts made by the handler."),
+        ]
+        aws_metrics = [
+            ("aws_calls_total", "counter", "calls", "AWS API calls."),
+            ("aws_call_seconds_total", "counter", "seconds", "Time spent in AWS API calls, retries included."),
+            ("aws_retries_total", "counter", "retries", "Retried AWS call attempts."),
+            ("aws_throttles_total", "counter", "throttles", "Throttled AWS call attempts."),
+            ("aws_errors_total", "counter", "errors", "AWS API calls that failed."),
+        ]
+
+        lines = []
+        with self._lock:
+            for metric, metric_type, key, description in handler_metrics:
+                lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {metric_type}"]
+                lines += [f'{metric}{{handler="{name}"}} {stats[key]}' for name, stats in self.handlers.items()]
+            for metric, metric_type, key, description in aws_metrics:
+                lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {metric_type}"]
+                lines += [f'{metric}{{service="{stats["service"]}",operation="{stats["operation"]}"}} {stats[key]}'
+                          for stats in self.aws_operations.values()]
+        return "\n".join(lines) + "\n"
+
+    def start_metrics_server(self, port, host='127.0.0.1'):
+        """
+        Serves prometheus_text() on http://<host>:<port>/metrics from a daemon thread. Only the local machine can
+        reach it by default; pass host='0.0.0.0' (TRACING_PROMETHEUS_HOST) to let a remote Prometheus scrape it.
+        """
+        tracer = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        print(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+
+def _is_nested_call(handler):
+    # A handler method calling another instrumented method of the same handler (e.g.
+    # AbstractAsyncHandler.handle running handle_async, or super().handle in a handler subclass)
+    # stays in the handler's span.
+    span = current_span.get()
+    return span is not None and span.handler is handler
+
+
+def trace_handle(handle):
+    @functools.wraps(handle)
+    def wrapper(self, request):
+        tracer = Tracer.get_default()
+        if tracer is None or _is_nested_call(self):
+            return handle(self, request)
+
+        span = tracer.start_span(self, request)
+        token = current_span.set(span)
+        result = error = None
+        try:
+            result = handle(self, request)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            current_span.reset(token)
+            tracer.end_span(span, result if result is not None else request, error)
+    return wrapper
+
+
+def trace_handle_async(handle_async):
+    @functools.wraps(handle_async)
+    async def wrapper(self, request):
+        tracer = Tracer.get_default()
+        if tracer is None or _is_nested_call(self):
+            return await handle_async(self, request)
+
+        span = tracer.start_span(self, request)
+        token = current_span.set(span)
+        result = error = None
+        try:
+            result = await handle_async(self, request)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            current_span.reset(token)
+            tracer.end_span(span, result if result is not None else request, error)
+    return wrapper
+
+
+def instrument_handler_class(cls):
+    """
+    Wraps the handle() / handle_async() methods a handler class defines with tracing spans.
+    """
+    for name, wrap in (("handle", trace_handle), ("handle_async", trace_handle_async)):
+        method = cls.__dict__.get(name)
+        if method is not None and not getattr(method, '__isabstractmethod__', False) and not getattr(method, '__traced__', False):
+            wrapper = wrap(method)
+            wrapper.__traced__ = True
+            setattr(cls, name, wrapper)
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+from utils.aws_boto_client_manager import AWSBotoClientManager
+
+
+class SQSCompletionSource:
+    """
+    Waits for Amazon Transcribe job completion events on an SQS queue instead of polling the job.
+    The queue can receive S3 object-created notifications for the transcript output folder (directly
+    or through SNS), or EventBridge "Transcribe Job State Change" events.
+
+    One source is shared per queue in a process (see get()): a single waiter at a time long-polls the
+    queue and hands every event to the waiter of its job, so concurrent jobs do not steal each other's
+    messages. Events for jobs of other processes are hidden for REQUEUE_VISIBILITY_SECONDS; events for
+    jobs that no longer exist, and messages that are not completion events, are deleted.
+    """
+
+    # How long an event for a job nobody waits for in this process stays invisible before it is received again
+    REQUEUE_VISIBILITY_SECONDS = 10
+
+    _sources = {}
+    _sources_lock = threading.Lock()
+
+    def __init__(self, queue_url, output_folder=""):
+        self.queue_url = queue_url
+        self.output_folder = output_folder or ""
+        self.sqs_client = AWSBotoClientManager.get_client('sqs')
+        self._condition = threading.Condition()
+        self._waiting = set()
+        self._statuses = {}
+        self._polling = False
+
+    @classmethod
+    def get(cls, queue_url, output_folder=""):
+        key = (queue_url, output_folder or "")
+        with cls._sources_lock:
+            if key not in cls._sources:
+                cls._sources[key] = cls(queue_url, output_folder)
+            return cls._sources[key]
+
+    def wait(self, job_name, timeout):
+        """
+        Returns the job status ('COMPLETED' / 'FAILED') once an event for the job arrives, or None after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._waiting.add(job_name)
+        try:
+            while True:
+                with self._condition:
+                    # Wait until the job's event was handed over, or until it is our turn to poll the queue.
+                    while True:
+                        if job_name in self._statuses:
+                            return self._statuses.pop(job_name)
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return None
+                        if not self._polling:
+                            self._polling = True
+                            break
+                        self._condition.wait(remaining)
+                try:
+                    self.receive(int(max(1, min(20, remaining))))
+                finally:
+                    with self._condition:
+                        self._polling = False
+                        self._condition.notify_all()
+        finally:
+            with self._condition:
+                self._waiting.discard(job_name)
+
+    def receive(self, wait_seconds):
+        """
+        Long-polls the queue once and dispatches the received events.
+        """
+        response = self.sqs_client.receive_message(QueueUrl=self.queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=wait_seconds)
+        for message in response.get('Messages', []):
+            job_name, status = self.parse(message['Body'])
+            with self._condition:
+                waited_for = job_name in self._waiting
+                if waited_for:
+                    self._statuses[job_name] = status
+            # The queue is dedicated to completion events: anything else, and events of jobs that are gone, are dropped.
+            if waited_for or not job_name or not self.job_exists(job_name):
+                self.sqs_client.delete_message(QueueUrl=self.queue_url, ReceiptHandle=message['ReceiptHandle'])
+            else:
+                # Another process's job: leave the event invisible for a while. Making it visible
+                # right away would have it received again at once, turning the long poll into a busy loop.
+                self.sqs_client.change_message_visibility(
+                    QueueUrl=self.queue_url, ReceiptHandle=message['ReceiptHandle'], VisibilityTimeout=self.REQUEUE_VISIBILITY_SECONDS)
+
+    @staticmethod
+    def job_exists(job_name):
+        transcribe_client = AWSBotoClientManager.get_client('transcribe')
+        try:
+            transcribe_client.get_transcription_job(TranscriptionJobName=job_name)
+            return True
+        except transcribe_client.exceptions.BadRequestException:
+            # Transcribe answers "The requested job couldn't be found" with a BadRequestException.
+            return False
+
+    def parse(self, body):
+        """
+        Returns the (job name, status) of a completion event, or (None, None) for any other message.
+        """
+        try:
+            event = json.loads(body)
+            if 'Message' in event and 'TopicArn' in event:
+                # Unwrap SNS notifications.
+                event = json.loads(event['Message'])
+        except (TypeError, ValueError):
+            return None, None
+
+        detail = event.get('detail') or {}
+        if detail.get('TranscriptionJobName') and detail.get('TranscriptionJobStatus'):
+            return detail['TranscriptionJobName'], detail['TranscriptionJobStatus']
+
+        for record in event.get('Records', []):
+            key = record.get('s3', {}).get('object', {}).get('key', '')
+            if record.get('eventName', '').startswith('ObjectCreated') and key.startswith(self.output_folder) and key.endswith('.json'):
+                return key[len(self.output_folder):-len('.json')], 'COMPLETED'
+        return None, None
+
+
+class LocalCompletionQueue:
+    """
+    In-process stand-in for the completion queue, for testing and offline runs: whoever completes
+    a job calls publish(), waiters are woken up immediately.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self._statuses = {}
+        self._condition = threading.Condition()
+
+    @classmethod
+    def default(cls):
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def publish(self, job_name, status='COMPLETED'):
+        with self._condition:
+            self._statuses[job_name] = status
+            self._condition.notify_all()
+
+    def wait(self, job_name, timeout):
+        with self._condition:
+            self._condition.wait_for(lambda: job_name in self._statuses, timeout=timeout)
+            return self._statuses.pop(job_name, None)
+
+
+def get_completion_source(output_folder=""):
+    """
+    Returns the completion source selected by TRANSCRIBE_COMPLETION_MODE ('sqs' or 'local'),
+    or None for the default polling mode.
+    """
+    mode = os.getenv('TRANSCRIBE_COMPLETION_MODE', 'poll').lower()
+    if mode == 'sqs':
+        queue_url = os.getenv('TRANSCRIBE_COMPLETION_QUEUE_URL')
+        if not queue_url:
+            raise ValueError("TRANSCRIBE_COMPLETION_QUEUE_URL environment variable is not set.")
+        return SQSCompletionSource.get(queue_url, output_folder)
+    if mode == 'local':
+        return LocalCompletionQueue.default()
+    return None
@@ -0,0 +1,83 @@
+import json
+import os
+import time
+from urllib.parse import parse_qs, urlparse
+from utils.aws_boto_client_manager import AWSBotoClientManager
+
+
+class TranscriptStore:
+    """
+    Stores transcripts keyed on the media content (hash of the audio bytes, or the YouTube video id),
+    so the same recording is never uploaded and transcribed twice. The local tier lives in
+    DIR_STORAGE/transcripts; when TRANSCRIPT_CACHE_S3_PREFIX is set, transcripts are also shared
+    through that prefix in BUCKET_NAME.
+    """
+
+    def __init__(self, local_dir=None, bucket_name=None, s3_prefix=None):
+        self.local_dir = local_dir or os.path.join(os.getenv('DIR_STORAGE', './'), 'transcripts')
+        self.bucket_name = bucket_name or os.getenv('BUCKET_NAME')
+        self.s3_prefix = s3_prefix if s3_prefix is not None else os.getenv('TRANSCRIPT_CACHE_S3_PREFIX')
+
+    @staticmethod
+    def is_enabled():
+        return os.getenv('TRANSCRIPT_CACHE', 'true').lower() in ('true', '1', 't')
+
+    def get(self, key):
+        """
+        Returns the cached transcript for the key, or None.
+        """
+        local_path = self._local_path(key)
+        if os.path.exists(local_path):
+            with open(local_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['transcript']
+
+        if self.s3_prefix and self.bucket_name:
+            s3_client = AWSBotoClientManager.get_client('s3')
+            try:
+                result = s3_client.get_object(Bucket=self.bucket_name, Key=self._s3_key(key))
+            except s3_client.exceptions.NoSuchKey:
+                return None
+            entry = json.loads(result['Body'].read().decode('utf-8'))
+            # Keep a local copy so the next lookup doesn't need S3.
+            self._write_local(key, entry)
+            return entry['transcript']
+
+        return None
+
+    def put(self, key, transcript, source=None):
+        entry = {"transcript": transcript, "source": source, "created_at": time.time()}
+        self._write_local(key, entry)
+
+        if self.s3_prefix and self.bucket_name:
+            s3_client = AWSBotoClientManager.get_client('s3')
+            s3_client.put_object(Bucket=self.bucket_name, Key=self._s3_key(key), Body=json.dumps(entry).encode('utf-8'), ContentType='application/json')
+
+    def _write_local(self, key, entry):
+        os.makedirs(self.local_dir, exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial transcript.
+        tmp_path = f"{self._local_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._local_path(key))
+
+    def _local_path(self, key):
+        return os.path.join(self.local_dir, f"{key}.json")
+
+    def _s3_key(self, key):
+        return f"{self.s3_prefix}{key}.json"
+
+
+def youtube_video_id(url):
+    """
+    Extracts the video id from youtube.com/watch?v=<id>, youtu.be/<id> and youtube.com/shorts/<id> URLs.
+    """
+    parsed = urlparse(url)
+    if parsed.hostname and parsed.hostname.endswith('youtu.be'):
+        return parsed.path.lstrip('/').split('/')[0] or None
+    video_id = parse_qs(parsed.query).get('v')
+    if video_id:
+        return video_id[0]
+    parts = [part for part in parsed.path.split('/') if part]
+    if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+        return parts[1]
+    return None
@@ -1,22 +1,132 @@
-from urllib.request import urlopen
-from bs4 import BeautifulSoup
+import os
+from lxml import etree
+from utils.http_client import HTTPFetcher
+
+# Subtrees whose text never goes into the prompt
+SKIPPED_TAGS = {'head', 'script', 'style', 'noscript', 'template', 'svg', 'nav', 'footer'}
+# Table cells are separated with ' | ' on the line of their row
+CELL_TAGS = {'td', 'th'}
+# Elements that start a new line of text
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'body', 'br', 'caption', 'dd', 'details', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'html',
+    'li', 'main', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'tbody', 'tfoot', 'thead', 'tr', 'ul',
+}
 
 def fetch_webpage(url):
     try:
-        page = urlopen(url)
-        html = page.read().decode("utf-8")      
-        start_index = html.find("<body")
-        end_index = html.find("</body>")
-        return html[start_index:end_index]
+        return HTTPFetcher.get_default().fetch(url).text
 
     except Exception as e:
         print(f"Error fetching URL {url}: {e}")
         return None
-    
+
+def fetch_webpages(urls):
+    """
+    Fetches many pages concurrently over the pooled connections. Returns the HTML of each page, in the
+    order of the URLs, with None for the pages that could not be fetched.
+    """
+    pages = []
+    for url, result in zip(urls, HTTPFetcher.get_default().fetch_many(urls)):
+        if isinstance(result, Exception):
+            print(f"Error fetching URL {url}: {result}")
+            pages.append(None)
+        else:
+            pages.append(result.text)
+    return pages
+
 def clean_html(html_content):
+    """
+    Extracts the text of an HTML document, one line per block element, without script, style,
+    navigation and footer content. Set HTML_CLEANER=bs4 to use BeautifulSoup's get_text() instead.
+    """
+    if os.getenv('HTML_CLEANER', 'lxml').lower() == 'bs4':
+        return clean_html_bs4(html_content)
+    return ''.join(iter_clean_html([html_content])).strip()
+
+def clean_html_bs4(html_content):
     """
     Uses BeautifulSoup to extract text from the HTML content's body.
     """
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html_content, 'lxml')
     text = soup.body.get_text(separator=' ', strip=True) if soup.body else ''
-    return text
\ No newline at end of file
+    return text
+
+class _TextExtractor:
+    """
+    lxml parser target: receives the parse events and keeps only the text, so no document tree is built.
+    Completed lines are collected until take() is called; only the current block is buffered.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self._pieces = []
+        self._skip_depth = 0
+        self._cells = 0
+
+    def start(self, tag, attrib):
+        if self._skip_depth or tag in SKIPPED_TAGS:
+            # libxml2 reports balanced start / end events, so counting every tag finds the end of the subtree.
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._end_line()
+        elif tag in CELL_TAGS:
+            if self._cells:
+                self._pieces.append(' | ')
+            self._cells += 1
+
+    def end(self, tag):
+        if self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self._end_line()
+
+    def data(self, data):
+        if not self._skip_depth:
+            self._pieces.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        self._end_line()
+
+    def take(self):
+        lines = self.lines
+        self.lines = []
+        return lines
+
+    def _end_line(self):
+        line = ' '.join(''.join(self._pieces).split())
+        self._pieces = []
+        self._cells = 0
+        if line:
+            self.lines.append(line)
+
+def iter_clean_html(html_chunks):
+    """
+    Streaming counterpart of clean_html(): feeds the HTML chunks to lxml's event parser and yields the
+    text lines as they are completed, so memory stays bounded by the largest block.
+    """
+    if os.getenv('HTML_CLEANER', 'lxml').lower() == 'bs4':
+        yield clean_html_bs4(''.join(html_chunks))
+        return
+
+    extractor = _TextExtractor()
+    parser = etree.HTMLParser(target=extractor)
+    fed = False
+    for chunk in html_chunks:
+        if chunk:
+            parser.feed(chunk)
+            fed = True
+        lines = extractor.take()
+        if lines:
+            yield '\n'.join(lines) + '\n'
+    if not fed:
+        return  # lxml refuses to close a parser that was never fed
+    parser.close()
+    lines = extractor.take()
+    if lines:
+        yield '\n'.join(lines) + '\n'